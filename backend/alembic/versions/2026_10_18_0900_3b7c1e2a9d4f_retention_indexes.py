@@ -0,0 +1,35 @@
+"""retention indexes
+
+Revision ID: 3b7c1e2a9d4f
+Revises: f546823123d3
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c1e2a9d4f'
+down_revision: Union[str, Sequence[str], None] = 'f546823123d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built without blocking writes, which needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_token_blacklist_expires_at'), 'token_blacklist', ['expires_at'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_invitations_expires_at'), 'invitations', ['expires_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_activations_used_updated_at', 'activations', ['updated_at'], unique=False, postgresql_where=sa.text('is_used'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_activations_used_updated_at', table_name='activations', postgresql_where=sa.text('is_used'), postgresql_concurrently=True)
+        op.drop_index(op.f('ix_invitations_expires_at'), table_name='invitations', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_token_blacklist_expires_at'), table_name='token_blacklist', postgresql_concurrently=True)
@@ -0,0 +1,40 @@
+"""email outbox
+
+Revision ID: 8e41d0c6b5a2
+Revises: 3b7c1e2a9d4f
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41d0c6b5a2'
+down_revision: Union[str, Sequence[str], None] = '3b7c1e2a9d4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_outbox_dispatched_at'), 'email_outbox', ['dispatched_at'], unique=False)
+    op.create_index('ix_email_outbox_pending', 'email_outbox', ['id'], unique=False, postgresql_where=sa.text('dispatched_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_pending', table_name='email_outbox', postgresql_where=sa.text('dispatched_at IS NULL'))
+    op.drop_index(op.f('ix_email_outbox_dispatched_at'), table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,34 @@
+"""project version uploads
+
+Revision ID: c52f9a17e0b3
+Revises: 8e41d0c6b5a2
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52f9a17e0b3'
+down_revision: Union[str, Sequence[str], None] = '8e41d0c6b5a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('project_versions', sa.Column('status', sa.String(length=20), server_default='ready', nullable=False))
+    op.add_column('project_versions', sa.Column('s3_key', sa.String(), nullable=True))
+    op.add_column('project_versions', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('project_versions', sa.Column('upload_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('project_versions', 'upload_id')
+    op.drop_column('project_versions', 'size')
+    op.drop_column('project_versions', 's3_key')
+    op.drop_column('project_versions', 'status')
@@ -0,0 +1,38 @@
+"""project files
+
+Revision ID: 5d9b2e4f7a61
+Revises: c52f9a17e0b3
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d9b2e4f7a61'
+down_revision: Union[str, Sequence[str], None] = 'c52f9a17e0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('project_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version_id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('s3_key', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['version_id'], ['project_versions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('version_id', 'path', name='uq_project_files_version_path')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('project_files')
@@ -0,0 +1,54 @@
+"""project active version pointer
+
+Revision ID: 9a4c7d2e1f08
+Revises: 5d9b2e4f7a61
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c7d2e1f08'
+down_revision: Union[str, Sequence[str], None] = '5d9b2e4f7a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('active_version_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_projects_active_version_id', 'projects', 'project_versions',
+        ['active_version_id'], ['id'], ondelete='SET NULL',
+    )
+    # Carry over the current flag; the newest wins if several were marked active
+    op.execute("""
+        UPDATE projects AS p
+        SET active_version_id = v.id
+        FROM (
+            SELECT DISTINCT ON (project_id) project_id, id
+            FROM project_versions
+            WHERE active
+            ORDER BY project_id, id DESC
+        ) AS v
+        WHERE v.project_id = p.id
+    """)
+    op.drop_column('project_versions', 'active')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('project_versions', sa.Column('active', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.execute("""
+        UPDATE project_versions AS v
+        SET active = true
+        FROM projects AS p
+        WHERE p.active_version_id = v.id
+    """)
+    op.alter_column('project_versions', 'active', server_default=None)
+    op.drop_constraint('fk_projects_active_version_id', 'projects', type_='foreignkey')
+    op.drop_column('projects', 'active_version_id')
@@ -0,0 +1,86 @@
+"""project version numbers
+
+Revision ID: e17b5c3a8d92
+Revises: 9a4c7d2e1f08
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e17b5c3a8d92'
+down_revision: Union[str, Sequence[str], None] = '9a4c7d2e1f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('project_versions', sa.Column('version_no', sa.Integer(), nullable=True))
+    # Existing rows keep the number in their "vN" name. Concurrent updates
+    # could hand out the same name twice, so only the oldest row with a given
+    # number keeps it; the later duplicates (and any name that does not parse)
+    # are numbered after the project's highest version, in creation order.
+    # The `version` text is left alone: it still names each row's storage prefix.
+    op.execute("""
+        UPDATE project_versions AS pv
+        SET version_no = n.version_no
+        FROM (
+            SELECT
+                id,
+                CAST(substring(version FROM 2) AS integer) AS version_no,
+                ROW_NUMBER() OVER (
+                    PARTITION BY project_id, CAST(substring(version FROM 2) AS integer)
+                    ORDER BY created_at, id
+                ) AS copy
+            FROM project_versions
+            WHERE version ~ '^v[0-9]{1,9}$'
+        ) AS n
+        WHERE n.id = pv.id AND n.copy = 1
+    """)
+    op.execute("""
+        UPDATE project_versions AS pv
+        SET version_no = n.version_no
+        FROM (
+            SELECT
+                v.id,
+                COALESCE(m.max_no, 0) + ROW_NUMBER() OVER (PARTITION BY v.project_id ORDER BY v.created_at, v.id) AS version_no
+            FROM project_versions AS v
+            LEFT JOIN (
+                SELECT project_id, max(version_no) AS max_no
+                FROM project_versions
+                GROUP BY project_id
+            ) AS m ON m.project_id = v.project_id
+            WHERE v.version_no IS NULL
+        ) AS n
+        WHERE n.id = pv.id
+    """)
+    op.alter_column('project_versions', 'version_no', nullable=False)
+    op.create_unique_constraint(
+        'uq_project_versions_project_version_no', 'project_versions', ['project_id', 'version_no']
+    )
+
+    op.add_column('projects', sa.Column('last_version_no', sa.Integer(), server_default='0', nullable=False))
+    # New versions are named "v{last_version_no}"; every existing name
+    # parses to at most the highest number handed out above
+    op.execute("""
+        UPDATE projects AS p
+        SET last_version_no = v.max_no
+        FROM (
+            SELECT project_id, max(version_no) AS max_no
+            FROM project_versions
+            GROUP BY project_id
+        ) AS v
+        WHERE v.project_id = p.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'last_version_no')
+    op.drop_constraint('uq_project_versions_project_version_no', 'project_versions', type_='unique')
+    op.drop_column('project_versions', 'version_no')
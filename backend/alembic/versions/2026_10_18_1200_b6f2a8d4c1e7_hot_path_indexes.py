@@ -0,0 +1,47 @@
+"""hot path indexes
+
+Revision ID: b6f2a8d4c1e7
+Revises: e17b5c3a8d92
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f2a8d4c1e7'
+down_revision: Union[str, Sequence[str], None] = 'e17b5c3a8d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Secondary indexes duplicating a primary key
+REDUNDANT_PK_INDEXES = [
+    ('ix_users_id', 'users'),
+    ('ix_activations_id', 'activations'),
+    ('ix_invitations_id', 'invitations'),
+    ('ix_token_blacklist_id', 'token_blacklist'),
+    ('ix_projects_id', 'projects'),
+    ('ix_project_versions_id', 'project_versions'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built without blocking writes, which needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_projects_name'), 'projects', ['name'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_projects_owner_id_id', 'projects', ['owner_id', 'id'], unique=False, postgresql_concurrently=True)
+        for name, table in REDUNDANT_PK_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in REDUNDANT_PK_INDEXES:
+            op.create_index(name, table, ['id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_projects_owner_id_id', table_name='projects', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_projects_name'), table_name='projects', postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""email outbox attempts
+
+Revision ID: 4c8e1f7b2a95
+Revises: b6f2a8d4c1e7
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e1f7b2a95'
+down_revision: Union[str, Sequence[str], None] = 'b6f2a8d4c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('email_outbox', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('email_outbox', sa.Column('last_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('email_outbox', 'last_error')
+    op.drop_column('email_outbox', 'next_attempt_at')
+    op.drop_column('email_outbox', 'attempts')
@@ -0,0 +1,42 @@
+"""pending versions index
+
+Revision ID: 7e3a9c5b1d24
+Revises: 4c8e1f7b2a95
+Create Date: 2026-10-18 12:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3a9c5b1d24'
+down_revision: Union[str, Sequence[str], None] = '4c8e1f7b2a95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built without blocking writes, which needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_project_versions_pending_created_at',
+            'project_versions',
+            ['created_at'],
+            unique=False,
+            postgresql_where=sa.text("status = 'pending'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_project_versions_pending_created_at',
+            table_name='project_versions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,111 @@
+"""
+The single place async engines are built, so web and worker processes
+share the same pool tuning from `config.Settings`.
+"""
+import time
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config import settings
+from .rls import RLSConnection
+
+
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def snapshot(self) -> dict:
+        checkouts = self.checkouts or 1
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / checkouts * 1000, 3),
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long checkouts wait for a
+    connection, including the time to open one when the pool grows.
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.metrics.checkouts += 1
+            self.metrics.wait_total += waited
+            self.metrics.wait_max = max(self.metrics.wait_max, waited)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep the counters going
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        status["max_overflow"] = pool.max_overflow
+        status.update(pool.metrics.snapshot())
+    return status
+
+
+def _connect_args() -> dict:
+    # Sends the caller's RLS context along with each BEGIN
+    args = {"connection_class": RLSConnection}
+    if settings.DB_PREPARED_STATEMENTS:
+        return {
+            **args,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    # Transaction-pooling proxies can't keep named statements across transactions
+    return {
+        **args,
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+
+def create_engine_from_settings(url: str, **overrides) -> AsyncEngine:
+    """Create an async engine using the DB_* settings; keyword arguments override them."""
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DB_ECHO,
+        "connect_args": _connect_args(),
+    }
+    options.update(overrides)
+    return create_async_engine(url, **options)
@@ -0,0 +1,79 @@
+"""
+Routing of read-only requests to replica databases.
+
+Each replica gets its own engine from the shared factory. A replica whose
+connection fails is skipped for DB_REPLICA_RETRY_SECONDS and the request
+moves on to the next one, falling back to the primary when none are left.
+A replica whose pool has no connection to spare within its pool timeout is
+treated the same way.
+"""
+import itertools
+import logging
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from config import settings
+from .engine import create_engine_from_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    def __init__(self, urls: list[str], strategy: str = "round_robin", retry_after: float = 30.0):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self.engines: list[AsyncEngine] = [create_engine_from_settings(url) for url in urls]
+        self.sessionmakers = [
+            async_sessionmaker(engine, expire_on_commit=False) for engine in self.engines
+        ]
+        self._down_until = [0.0] * len(self.engines)
+        self._next = itertools.count()
+
+    def candidates(self) -> list[int]:
+        """Healthy replica indexes, in the order they should be tried."""
+        now = time.monotonic()
+        healthy = [i for i, until in enumerate(self._down_until) if until <= now]
+        if not healthy:
+            return []
+        if self.strategy == "least_connections":
+            return sorted(healthy, key=lambda i: self.engines[i].pool.checkedout())
+        start = next(self._next) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_down(self, index: int):
+        self._down_until[index] = time.monotonic() + self.retry_after
+        logger.warning("Read replica %s unavailable; skipping it for %ss", index, self.retry_after)
+
+    async def open_session(self, info: dict | None = None) -> AsyncSession | None:
+        """
+        A session already connected to a healthy replica, or None if there is
+        none. `info` is set on the session before it connects, because
+        connecting begins its first transaction (see apps.db.rls).
+        """
+        for index in self.candidates():
+            session = self.sessionmakers[index]()
+            session.info.update(info or {})
+            try:
+                # Check out the connection now so failures surface before the view runs
+                await session.connection()
+                return session
+            # exc.TimeoutError: the replica's pool is exhausted, which is as good as down
+            except (exc.DBAPIError, exc.TimeoutError, OSError):
+                await session.close()
+                self.mark_down(index)
+        return None
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DB_REPLICA_URLS.split(",") if url.strip()],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+)
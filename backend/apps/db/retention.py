@@ -0,0 +1,98 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Which rows of a table have expired.
+
+    A row is removed once `column` is older than now minus `keep_for`.
+    `conditions` narrows that further (e.g. only used activation codes).
+    The column should be indexed so every batch is an index range scan.
+    """
+    model: Any
+    column: Any
+    keep_for: timedelta = timedelta(0)
+    conditions: tuple = field(default_factory=tuple)
+    batch_size: int = 5000
+
+    @property
+    def name(self) -> str:
+        return self.model.__tablename__
+
+
+def expired_batch(policy: RetentionPolicy, cutoff: datetime, last: tuple | None = None):
+    """Primary keys of the next batch of expired rows after `last` (a `(column, pk)` pair)."""
+    primary_key = policy.model.__mapper__.primary_key[0]
+    batch = (
+        select(primary_key)
+        .where(policy.column < cutoff, *policy.conditions)
+        .order_by(policy.column, primary_key)
+        .limit(policy.batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    if last is not None:
+        # The plain bound lets a single-column index seek to the start
+        batch = batch.where(
+            policy.column >= last[0],
+            tuple_(policy.column, primary_key) > tuple_(*last),
+        )
+    return batch
+
+
+async def purge_expired(
+    session_factory: async_sessionmaker[AsyncSession],
+    policy: RetentionPolicy,
+    now: datetime | None = None,
+) -> int:
+    """
+    Delete expired rows in batches of `policy.batch_size`, committing each one.
+
+    Batches walk the index on `policy.column` in `(column, primary key)`
+    order: each one starts after the last row the previous batch deleted, so
+    no batch rescans the range already purged (or the rows skipped because
+    live transactions had them locked; the next run picks those up). No
+    single statement holds locks or produces WAL for more than one batch.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - policy.keep_for
+    primary_key = policy.model.__mapper__.primary_key[0]
+    removed = 0
+    last = None
+
+    while True:
+        batch = expired_batch(policy, cutoff, last)
+        async with session_factory() as db:
+            try:
+                result = await db.execute(
+                    delete(policy.model)
+                    .where(primary_key.in_(batch.scalar_subquery()))
+                    .returning(policy.column, primary_key)
+                    .execution_options(synchronize_session=False)
+                )
+                deleted = result.all()
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                raise e
+
+        removed += len(deleted)
+        if len(deleted) < policy.batch_size:
+            return removed
+        last = max(tuple(row) for row in deleted)
+
+
+async def run_retention(
+    session_factory: async_sessionmaker[AsyncSession],
+    policies: list[RetentionPolicy],
+) -> dict[str, int]:
+    """Apply every policy against the same cutoff and report rows removed per table."""
+    now = datetime.now(timezone.utc)
+    return {
+        policy.name: await purge_expired(session_factory, policy, now)
+        for policy in policies
+    }
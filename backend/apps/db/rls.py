@@ -0,0 +1,56 @@
+"""
+Row-level-security context (`app.user_id`) for pooled asyncpg connections.
+
+Sessions opened for an authenticated request record the caller's id. When
+such a session starts a transaction, the id is handed to the underlying
+connection, which sends `SET LOCAL app.user_id` in the same simple-query
+message as `BEGIN`: no extra round trip, and the setting ends with the
+transaction, so it cannot leak to whoever checks the connection out next.
+"""
+import uuid
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+
+class RLSConnection(asyncpg.Connection):
+    """asyncpg connection that piggybacks a pending SET LOCAL onto the next BEGIN."""
+
+    __slots__ = ("pending_user_id",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending_user_id: str | None = None
+
+    async def execute(self, query: str, *args, timeout: float | None = None) -> str:
+        user_id, self.pending_user_id = self.pending_user_id, None
+        if user_id and not args and query.startswith("BEGIN"):
+            # Simple-query protocol: both statements travel in one message
+            query = f"{query} SET LOCAL app.user_id = '{user_id}';"
+        return await super().execute(query, *args, timeout=timeout)
+
+
+def _session_user_id(session: Session) -> str | None:
+    # Read at transaction start, after the request's auth dependency has run
+    state = session.info.get("request_state")
+    user_id = getattr(state, "user_id", None) if state is not None else session.info.get("rls_user_id")
+    # Only a well-formed uuid is ever interpolated into SQL
+    return str(uuid.UUID(str(user_id))) if user_id else None
+
+
+@event.listens_for(Session, "after_begin")
+def _set_rls_context(session, transaction, connection):
+    # SQLAlchemy's asyncpg adapter sends BEGIN lazily, on the first statement
+    driver = connection.connection.driver_connection
+    if isinstance(driver, RLSConnection):
+        driver.pending_user_id = _session_user_id(session)
+
+
+@event.listens_for(Pool, "checkin")
+def _clear_rls_context(dbapi_connection, connection_record):
+    # A session that began but never ran a statement leaves its id pending
+    driver = getattr(dbapi_connection, "driver_connection", None)
+    if isinstance(driver, RLSConnection):
+        driver.pending_user_id = None
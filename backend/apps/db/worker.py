@@ -0,0 +1,65 @@
+"""
+Async runtime for Celery worker processes.
+
+Each prefork child gets one event loop and one pooled async engine, created
+at `worker_process_init` and disposed at `worker_process_shutdown`. Tasks
+run their async logic with `run_async`, so connections are reused across
+task runs instead of being opened on a fresh `asyncio.run()` loop each time.
+"""
+import asyncio
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from config import settings
+from database import DATABASE_URL
+from .engine import create_engine_from_settings
+
+_loop: asyncio.AbstractEventLoop | None = None
+_engine: AsyncEngine | None = None
+_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+_shutdown_hooks: list = []
+
+
+@worker_process_init.connect
+def init_worker_runtime(**kwargs):
+    global _loop, _engine, _sessionmaker
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    # A worker runs one task at a time, so it needs far fewer connections
+    _engine = create_engine_from_settings(DATABASE_URL, pool_size=settings.DB_WORKER_POOL_SIZE)
+    _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_runtime(**kwargs):
+    global _loop, _engine, _sessionmaker
+    if _loop is None:
+        return
+    for hook in _shutdown_hooks:
+        _loop.run_until_complete(hook())
+    if _engine is not None:
+        _loop.run_until_complete(_engine.dispose())
+    _loop.run_until_complete(_loop.shutdown_asyncgens())
+    _loop.close()
+    _loop, _engine, _sessionmaker = None, None, None
+
+
+def run_async(coro):
+    """Run a coroutine to completion on this worker's persistent loop."""
+    if _loop is None:
+        # Solo/eager pools never emit worker_process_init
+        init_worker_runtime()
+    return _loop.run_until_complete(coro)
+
+
+def on_worker_shutdown(hook):
+    """Register an async callable to run on the worker loop before it closes."""
+    _shutdown_hooks.append(hook)
+    return hook
+
+
+def get_worker_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    if _sessionmaker is None:
+        init_worker_runtime()
+    return _sessionmaker
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import mimetypes
+import posixpath
+import tarfile
+import zipfile
+from dataclasses import dataclass
+from typing import IO, Iterator
+
+
+@dataclass
+class ArchiveEntry:
+    path: str
+    size: int
+    reader: IO[bytes]
+
+
+def safe_member_path(name: str) -> str | None:
+    """Normalise an archive member name; None for anything escaping the version prefix."""
+    path = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if path in ("", ".") or path == ".." or path.startswith("../"):
+        return None
+    return path
+
+
+def iter_archive(file_obj: IO[bytes]) -> Iterator[ArchiveEntry]:
+    """
+    Yield the regular files of a zip or tar archive without extracting to disk.
+
+    Tar archives (optionally compressed) are read as a forward-only stream,
+    so each entry's reader must be consumed before asking for the next one.
+    Zip archives need a seekable file to read their central directory.
+    """
+    if zipfile.is_zipfile(file_obj):
+        file_obj.seek(0)
+        with zipfile.ZipFile(file_obj) as archive:
+            for info in archive.infolist():
+                path = safe_member_path(info.filename)
+                if info.is_dir() or path is None:
+                    continue
+                with archive.open(info) as reader:
+                    yield ArchiveEntry(path, info.file_size, reader)
+        return
+
+    file_obj.seek(0)
+    with tarfile.open(fileobj=file_obj, mode="r|*") as archive:
+        for member in archive:
+            path = safe_member_path(member.name)
+            if not member.isfile() or path is None:
+                continue
+            yield ArchiveEntry(path, member.size, archive.extractfile(member))
+
+
+def content_type_for(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+# S3 CopyObject handles objects up to 5 GiB in a single request
+MAX_COPY_SIZE = 5 * 1024 ** 3
+
+
+def _read_and_hash(reader: IO[bytes]) -> tuple[bytes, str]:
+    """Read a small entry into memory and hash it (blocking)."""
+    data = reader.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+async def store_entries(
+    s3,
+    entries: Iterator[ArchiveEntry],
+    prefix: str,
+    concurrency: int,
+    previous: dict[str, str] | None = None,
+    owner_id: str | None = None,
+) -> list[dict]:
+    """
+    Store every entry under `prefix` and return the manifest
+    (path, content hash, size, key, whether it was copied).
+
+    Entries up to one multipart part are read into memory and hashed first;
+    content already stored by the previous version (`previous` maps content
+    hash -> key) is copied server side instead of uploaded, and at most
+    `concurrency` of them are in flight. Larger entries stream straight
+    through the multipart uploader, hashed on the way, so nothing touches
+    the disk and memory depends on part size and concurrency, never on the
+    archive size. (Their hash is only known once uploaded, so they are never
+    copied.)
+
+    A path that appears more than once (e.g. a tar appended to with
+    `tar -r`) is stored once, with its last copy's content, as extracting
+    the archive would.
+    """
+    previous = previous or {}
+    slots = asyncio.Semaphore(concurrency)
+    manifest: dict[str, dict] = {}
+    transfers: dict[str, asyncio.Task] = {}
+
+    async def transfer(data: bytes, key: str, content_type: str, source: str | None):
+        try:
+            if source:
+                await s3.copy(source, key)
+            else:
+                await s3.put_bytes(key, data, content_type)
+        finally:
+            slots.release()
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            while True:
+                await slots.acquire()
+                # Archive reads are blocking, so they run off the event loop
+                entry = await asyncio.to_thread(next, entries, None)
+                if entry is None:
+                    slots.release()
+                    break
+                key = f"{prefix}{entry.path}"
+                if entry.path in transfers:
+                    # Let the earlier copy land first so this one overwrites it
+                    await asyncio.wait([transfers.pop(entry.path)])
+                content_type = content_type_for(entry.path)
+
+                if entry.size > s3.part_size:
+                    # Already parallel across parts; running it inline caps
+                    # memory and finishes the entry before the stream moves on
+                    digest = hashlib.sha256()
+                    try:
+                        await s3.add(
+                            entry.reader, key, content_type=content_type,
+                            size=entry.size, owner_id=owner_id, digest=digest,
+                        )
+                    finally:
+                        slots.release()
+                    content_hash, source = digest.hexdigest(), None
+                else:
+                    try:
+                        data, content_hash = await asyncio.to_thread(_read_and_hash, entry.reader)
+                    except BaseException:
+                        slots.release()
+                        raise
+                    source = previous.get(content_hash)
+                    transfers[entry.path] = group.create_task(transfer(data, key, content_type, source))
+
+                manifest[entry.path] = {
+                    "path": entry.path,
+                    "content_hash": content_hash,
+                    "size": entry.size,
+                    "s3_key": key,
+                    "copied": source is not None,
+                }
+    except BaseExceptionGroup as e:
+        # Surface the failing transfer's error rather than the group wrapper
+        raise e.exceptions[0] from None
+
+    return list(manifest.values())
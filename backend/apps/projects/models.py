@@ -2,11 +2,13 @@ from datetime import datetime
 from typing import List, TYPE_CHECKING
 
 from sqlalchemy import (
+    BigInteger,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
-    Boolean,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -14,17 +16,24 @@ from sqlalchemy.orm import (
     mapped_column,
     relationship,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.dialects.postgresql import UUID
 if TYPE_CHECKING:
     from apps.users.models import Users
 from apps.db.base import Base
 
+
+class VersionStatus:
+    PENDING = "pending"
+    READY = "ready"
+    # Storage cleanup queued; the row is removed once the objects are gone
+    DELETING = "deleting"
+
 class Project(Base):
     __tablename__ = "projects"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    name: Mapped[str] = mapped_column(String, nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String, index=True, nullable=False)
 
     owner_id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -32,6 +41,25 @@ class Project(Base):
         nullable=False,
     )
 
+    # Highest version number handed out; bumped with UPDATE ... RETURNING
+    last_version_no: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+
+    # The live version; switching versions rewrites only this column
+    active_version_id: Mapped[int | None] = mapped_column(
+        ForeignKey(
+            "project_versions.id",
+            use_alter=True,
+            name="fk_projects_active_version_id",
+            ondelete="SET NULL",
+        ),
+        nullable=True,
+    )
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -51,13 +79,25 @@ class Project(Base):
         "ProjectVersion",
         back_populates="project",
         cascade="all, delete-orphan",
+        foreign_keys="ProjectVersion.project_id",
+    )
+
+    active_version: Mapped["ProjectVersion | None"] = relationship(
+        "ProjectVersion",
+        foreign_keys=[active_version_id],
+        post_update=True,
+    )
+
+    __table_args__ = (
+        # Ownership checks and newest-first listings per owner
+        Index("ix_projects_owner_id_id", "owner_id", "id"),
     )
 
 
 class ProjectVersion(Base):
     __tablename__ = "project_versions"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     project_id: Mapped[int] = mapped_column(
         ForeignKey("projects.id"),
@@ -65,7 +105,18 @@ class ProjectVersion(Base):
     )
 
     version: Mapped[str] = mapped_column(String, nullable=False)
-    active: Mapped[bool] = mapped_column(Boolean, default=False)
+    version_no: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # "pending" while a direct-to-storage upload is in progress, then "ready"
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default=VersionStatus.READY,
+        server_default=VersionStatus.READY,
+        nullable=False,
+    )
+    s3_key: Mapped[str | None] = mapped_column(String, nullable=True)
+    size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    upload_id: Mapped[str | None] = mapped_column(String, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -75,4 +126,50 @@ class ProjectVersion(Base):
     project: Mapped["Project"] = relationship(
         "Project",
         back_populates="versions",
+        foreign_keys=[project_id],
+    )
+
+    files: Mapped[List["ProjectFile"]] = relationship(
+        "ProjectFile",
+        back_populates="version",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        # Also the (project_id, version_no) lookup index
+        UniqueConstraint("project_id", "version_no", name="uq_project_versions_project_version_no"),
+        # The abandoned-upload reaper only looks at pending versions
+        Index(
+            "ix_project_versions_pending_created_at",
+            "created_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+
+class ProjectFile(Base):
+    """One file of a version's manifest: where it lives and what it contains."""
+    __tablename__ = "project_files"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    version_id: Mapped[int] = mapped_column(
+        ForeignKey("project_versions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    s3_key: Mapped[str] = mapped_column(String, nullable=False)
+
+    version: Mapped["ProjectVersion"] = relationship(
+        "ProjectVersion",
+        back_populates="files",
+    )
+
+    __table_args__ = (
+        # Also serves manifest lookups by version
+        UniqueConstraint("version_id", "path", name="uq_project_files_version_path"),
     )
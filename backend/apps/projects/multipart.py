@@ -0,0 +1,123 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+# S3 rejects multipart parts smaller than this (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+@dataclass
+class UploadProgress:
+    key: str
+    owner_id: str | None = None
+    total_bytes: int | None = None
+    uploaded_bytes: int = 0
+    parts_done: int = 0
+    status: str = "uploading"
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    def snapshot(self) -> dict:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "key": self.key,
+            "status": self.status,
+            "uploaded_bytes": self.uploaded_bytes,
+            "total_bytes": self.total_bytes,
+            "parts_done": self.parts_done,
+            "bytes_per_second": round(self.uploaded_bytes / elapsed) if elapsed else None,
+            "error": self.error,
+        }
+
+
+class MultipartUploader:
+    """
+    Uploads a file object to S3 as parallel multipart parts.
+
+    At most `concurrency` parts are in memory at once, since the next part
+    is only read after a slot frees up. Any failure aborts the multipart
+    upload so no orphaned parts are left behind. Parts are read in order,
+    so a `digest` passed to `upload` sees the whole file as it streams.
+    """
+
+    def __init__(self, client, bucket: str, part_size: int, concurrency: int):
+        self.client = client
+        self.bucket = bucket
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.concurrency = concurrency
+
+    async def _read(self, file_obj, digest=None) -> bytes:
+        # UploadFile.file and archive members are blocking file objects
+        chunk = await asyncio.to_thread(file_obj.read, self.part_size)
+        if digest is not None:
+            digest.update(chunk)
+        return chunk
+
+    async def upload(
+        self,
+        file_obj,
+        key: str,
+        content_type: str | None = None,
+        progress: UploadProgress | None = None,
+        digest=None,
+    ) -> str:
+        """
+        Upload `file_obj` to `key` and return the object's ETag. `digest`
+        (a hashlib object) is fed every byte read, on the way through.
+        """
+        progress = progress or UploadProgress(key=key)
+        extra = {"ContentType": content_type} if content_type else {}
+
+        first = await self._read(file_obj, digest)
+        if len(first) < self.part_size:
+            # Fits in one request; multipart would only add round trips
+            response = await self.client.put_object(Bucket=self.bucket, Key=key, Body=first, **extra)
+            progress.uploaded_bytes = len(first)
+            progress.parts_done = 1
+            return response["ETag"]
+
+        upload = await self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)
+        upload_id = upload["UploadId"]
+        slots = asyncio.Semaphore(self.concurrency)
+        parts: list[dict] = []
+
+        async def send_part(number: int, body: bytes):
+            try:
+                response = await self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=body,
+                )
+                parts.append({"PartNumber": number, "ETag": response["ETag"]})
+                progress.uploaded_bytes += len(body)
+                progress.parts_done += 1
+            finally:
+                slots.release()
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                number, body = 1, first
+                while body:
+                    await slots.acquire()
+                    group.create_task(send_part(number, body))
+                    number += 1
+                    body = await self._read(file_obj, digest)
+
+            response = await self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+            )
+            return response["ETag"]
+        except BaseException as e:
+            await asyncio.shield(
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            )
+            if isinstance(e, BaseExceptionGroup):
+                # Surface the failing part's error rather than the group wrapper
+                raise e.exceptions[0] from None
+            raise
@@ -1,5 +1,21 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from datetime import datetime
+from typing import List, Optional
 
 
+class UploadInit(BaseModel):
+    # Either `name` (new project) or `project_id` (new version of an existing one)
+    name: Optional[str] = None
+    project_id: Optional[int] = None
+    filename: str
+    size: int = Field(gt=0)
+    content_type: Optional[str] = None
 
+class UploadedPart(BaseModel):
+    part_number: int
+    etag: str
+
+class UploadComplete(BaseModel):
+    version_id: int
+    etag: Optional[str] = None
+    parts: Optional[List[UploadedPart]] = None
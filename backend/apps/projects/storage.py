@@ -0,0 +1,260 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+import aioboto3
+from aiobotocore.config import AioConfig
+
+from config import settings
+from apps.users.cache import TTLCache
+from .multipart import MultipartUploader, UploadProgress
+
+
+class S3Service:
+    """
+    S3 access through one long-lived client per process.
+
+    The client (and its keep-alive connection pool) is opened by `start()`
+    from the app lifespan, or lazily on first use in Celery workers, and
+    released by `close()`.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str = "us-east-1",
+        endpoint_url: str | None = None,
+        max_pool_connections: int = 50,
+        keepalive_timeout: float = 60.0,
+        retry_max_attempts: int = 5,
+        retry_mode: str = "standard",
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        part_size: int = 16 * 1024 * 1024,
+        part_concurrency: int = 8,
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.session = aioboto3.Session()
+        self.config = AioConfig(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={"max_attempts": retry_max_attempts, "mode": retry_mode},
+            connector_args={"keepalive_timeout": keepalive_timeout},
+        )
+        self.part_size = part_size
+        self.part_concurrency = part_concurrency
+        # In-flight and recently finished uploads, for progress reporting
+        self.uploads = TTLCache(maxsize=10000)
+        self._client = None
+        self._stack: AsyncExitStack | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._lock:
+            if self._client is not None:
+                return
+            stack = AsyncExitStack()
+            self._client = await stack.enter_async_context(
+                self.session.client(
+                    "s3",
+                    region_name=self.region,
+                    endpoint_url=self.endpoint_url,
+                    config=self.config,
+                )
+            )
+            self._stack = stack
+
+    async def close(self):
+        async with self._lock:
+            if self._stack is not None:
+                await self._stack.aclose()
+            self._client, self._stack = None, None
+
+    async def client(self):
+        if self._client is None:
+            await self.start()
+        return self._client
+
+    async def add(
+        self,
+        file_obj,
+        key: str,
+        content_type: str | None = None,
+        size: int | None = None,
+        owner_id: str | None = None,
+        digest=None,
+    ) -> str:
+        """
+        Upload `file_obj` (multipart and in parallel when large) and return
+        its ETag, feeding the bytes to `digest` (a hashlib object) if given.
+        """
+        progress = UploadProgress(key=key, owner_id=owner_id, total_bytes=size)
+        self.uploads.set(key, progress, expires_at=progress.started_at + 24 * 3600)
+        uploader = MultipartUploader(
+            await self.client(),
+            self.bucket,
+            part_size=self.part_size,
+            concurrency=self.part_concurrency,
+        )
+        try:
+            etag = await uploader.upload(file_obj, key, content_type=content_type, progress=progress, digest=digest)
+        except BaseException as e:
+            progress.status, progress.error = "failed", str(e)
+            raise
+        finally:
+            progress.finished_at = time.time()
+            # Keep finished uploads visible for a few minutes
+            self.uploads.set(key, progress, expires_at=progress.finished_at + 600)
+        progress.status = "completed"
+        return etag
+
+    def uploads_for(self, owner_id: str) -> list[dict]:
+        return [
+            progress.snapshot()
+            for progress in self.uploads.values()
+            if progress.owner_id == owner_id
+        ]
+
+    async def put_bytes(self, key: str, body: bytes, content_type: str | None = None) -> str:
+        client = await self.client()
+        extra = {"ContentType": content_type} if content_type else {}
+        response = await client.put_object(Bucket=self.bucket, Key=key, Body=body, **extra)
+        return response["ETag"]
+
+    async def copy(self, source_key: str, key: str):
+        """Server-side copy within the bucket; no bytes pass through this process."""
+        client = await self.client()
+        await client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": source_key},
+        )
+
+    async def presign_put(self, key: str, content_type: str | None, expires_in: int) -> str:
+        client = await self.client()
+        params = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        return await client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+
+    async def start_multipart(self, key: str, content_type: str | None) -> str:
+        client = await self.client()
+        extra = {"ContentType": content_type} if content_type else {}
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)
+        return upload["UploadId"]
+
+    async def presign_parts(self, key: str, upload_id: str, part_count: int, expires_in: int) -> list[dict]:
+        client = await self.client()
+        return [
+            {
+                "part_number": number,
+                "url": await client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": self.bucket,
+                        "Key": key,
+                        "UploadId": upload_id,
+                        "PartNumber": number,
+                    },
+                    ExpiresIn=expires_in,
+                ),
+            }
+            for number in range(1, part_count + 1)
+        ]
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: list[dict]):
+        client = await self.client()
+        await client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+        )
+
+    async def abort_multipart(self, key: str, upload_id: str):
+        client = await self.client()
+        await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    async def head(self, key: str) -> dict | None:
+        client = await self.client()
+        try:
+            return await client.head_object(Bucket=self.bucket, Key=key)
+        except client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def remove(self, key: str):
+        client = await self.client()
+        await client.delete_object(
+            Bucket=self.bucket,
+            Key=key,
+        )
+
+    async def delete_prefix(self, prefix: str, concurrency: int = 1, on_progress=None) -> int:
+        """
+        Delete every object under `prefix` and return how many were removed.
+
+        Listing pages (up to 1000 keys, the DeleteObjects limit) are deleted
+        as they arrive, with up to `concurrency` batches in flight.
+        `on_progress(deleted)` is called after each batch.
+        """
+        client = await self.client()
+        paginator = client.get_paginator("list_objects_v2")
+        slots = asyncio.Semaphore(concurrency)
+        deleted = 0
+
+        async def delete_batch(keys: list[str]):
+            nonlocal deleted
+            try:
+                response = await client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={
+                        "Objects": [{"Key": key} for key in keys],
+                        "Quiet": True,
+                    },
+                )
+                # Quiet mode only reports the keys that failed
+                errors = response.get("Errors", [])
+                if errors:
+                    raise RuntimeError(
+                        f"Failed to delete {len(errors)} objects: {errors[0].get('Message')}"
+                    )
+                deleted += len(keys)
+                if on_progress:
+                    on_progress(deleted)
+            finally:
+                slots.release()
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                async for page in paginator.paginate(
+                    Bucket=self.bucket,
+                    Prefix=prefix
+                ):
+                    objects = page.get("Contents", [])
+                    if not objects:
+                        continue
+                    await slots.acquire()
+                    group.create_task(delete_batch([obj["Key"] for obj in objects]))
+        except BaseExceptionGroup as e:
+            raise e.exceptions[0] from None
+        return deleted
+
+
+s3 = S3Service(
+    bucket=settings.S3_BUCKET,
+    region=settings.S3_REGION,
+    endpoint_url=settings.S3_ENDPOINT_URL,
+    max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+    keepalive_timeout=settings.S3_KEEPALIVE_TIMEOUT,
+    retry_max_attempts=settings.S3_RETRY_MAX_ATTEMPTS,
+    retry_mode=settings.S3_RETRY_MODE,
+    connect_timeout=settings.S3_CONNECT_TIMEOUT,
+    read_timeout=settings.S3_READ_TIMEOUT,
+    part_size=settings.S3_MULTIPART_PART_SIZE,
+    part_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+)
@@ -0,0 +1,98 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from celery import shared_task
+from sqlalchemy import select, delete, update
+from config import settings
+from apps.db.worker import run_async, get_worker_sessionmaker
+from .models import Project, ProjectVersion, VersionStatus
+from .storage import s3
+
+logger = logging.getLogger(__name__)
+
+
+def delete_version_task_id(version_id: int) -> str:
+    # Deterministic, so the status endpoint can find the job from the version alone
+    return f"delete-project-version-{version_id}"
+
+async def _delete_version_logic(task, version_id: int):
+    """
+    Remove a version marked "deleting": its storage prefix first, then the row.
+    """
+    SessionLocal = get_worker_sessionmaker()
+
+    # 1. Resolve the storage prefix
+    async with SessionLocal() as db:
+        row = (await db.execute(
+            select(Project.name, ProjectVersion.version, ProjectVersion.s3_key, ProjectVersion.upload_id)
+            .join(Project, Project.id == ProjectVersion.project_id)
+            .where(ProjectVersion.id == version_id)
+        )).first()
+    if row is None:
+        return {"version_id": version_id, "deleted_objects": 0}
+    name, version, s3_key, upload_id = row
+
+    # 2. Drop any unfinished direct upload, then everything under the prefix
+    if upload_id:
+        try:
+            await s3.abort_multipart(s3_key, upload_id)
+        except Exception as e:
+            # Already aborted or completed (e.g. on a retry); the prefix delete covers it
+            logger.warning("Could not abort upload for version %s: %s", version_id, e)
+
+    def report(deleted: int):
+        task.update_state(
+            state="PROGRESS",
+            meta={"version_id": version_id, "deleted_objects": deleted},
+        )
+
+    deleted = await s3.delete_prefix(
+        f"projects/{name}/{version}/",
+        concurrency=settings.S3_DELETE_CONCURRENCY,
+        on_progress=report,
+    )
+
+    # 3. Storage is clean; remove the row (its file manifest cascades)
+    async with SessionLocal() as db:
+        await db.execute(delete(ProjectVersion).where(ProjectVersion.id == version_id))
+        await db.commit()
+
+    logger.info("Deleted version %s: %s objects removed", version_id, deleted)
+    return {"version_id": version_id, "deleted_objects": deleted}
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def delete_project_version_task(self, version_id: int):
+    """Background storage cleanup for a deleted project version."""
+    return run_async(_delete_version_logic(self, version_id))
+
+async def _reap_pending_versions_logic() -> list[int]:
+    """
+    Hand direct uploads that were started but never completed (pending for
+    longer than PROJECT_PENDING_UPLOAD_TTL) to the regular version deletion,
+    which aborts the multipart upload and clears the prefix before removing
+    the row. Marking them "deleting" first makes a late complete call fail.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.PROJECT_PENDING_UPLOAD_TTL)
+    async with get_worker_sessionmaker()() as db:
+        try:
+            version_ids = (await db.scalars(
+                update(ProjectVersion)
+                .where(ProjectVersion.status == VersionStatus.PENDING, ProjectVersion.created_at < cutoff)
+                .values(status=VersionStatus.DELETING)
+                .returning(ProjectVersion.id)
+                .execution_options(synchronize_session=False)
+            )).all()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+    for version_id in version_ids:
+        delete_project_version_task.apply_async(args=[version_id], task_id=delete_version_task_id(version_id))
+    return list(version_ids)
+
+@shared_task
+def reap_pending_versions_task():
+    """Remove versions whose direct upload was abandoned."""
+    version_ids = run_async(_reap_pending_versions_logic())
+    return f"Reaped {len(version_ids)} abandoned uploads."
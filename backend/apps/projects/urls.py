@@ -1,33 +1,36 @@
-from fastapi import APIRouter, Depends, Response, Request
+from fastapi import APIRouter, Depends, Response, Request, Query
+from config import settings
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
+from database import get_db, get_read_db
 from . import views, schemas
-from apps.users.decorators import login_required, role_required
+from apps.users.dependency import get_current_user, require_role
 from typing import Optional
 from fastapi import Request, Form, UploadFile, File
 
 router = APIRouter()
 
-@router.post("/upload", response_model=dict)
-@login_required
+@router.post("/upload", response_model=dict, dependencies=[Depends(get_current_user)])
 async def upload_project(
     db: AsyncSession = Depends(get_db),
     name: str = Form(...),
     file: UploadFile = File(...),
+    archive: bool = Form(False),
     request: Request = None
 ):
+    # archive=true expands a zip/tar site bundle into one object per file
     return await views.upload_project_view(
         db=db, 
         name=name, 
         file=file, 
-        request=request
+        request=request,
+        archive=archive,
     )
 
-@router.put("/update/{project_id}", response_model=dict)
-@login_required
+@router.put("/update/{project_id}", response_model=dict, dependencies=[Depends(get_current_user)])
 async def update_project(
     project_id: int,
     file: UploadFile = File(...),
+    archive: bool = Form(False),
     db: AsyncSession = Depends(get_db),
     request: Request = None,
 ):
@@ -36,10 +39,10 @@ async def update_project(
         request=request,
         project_id=project_id,
         file=file,
+        archive=archive,
     )
 
-@router.put("/change-version/{project_id}", response_model=dict)
-@login_required
+@router.put("/change-version/{project_id}", response_model=dict, dependencies=[Depends(get_current_user)])
 async def change_version(
     project_id: int,
     version_id: int,
@@ -48,17 +51,15 @@ async def change_version(
 ):
     return await views.change_version_view(db, request, project_id, version_id)
 
-@router.get("/versions/{project_id}", response_model=dict)
-@login_required
+@router.get("/versions/{project_id}", response_model=dict, dependencies=[Depends(get_current_user)])
 async def get_versions(
     project_id: int,
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     return await views.get_versions_view(db, request, project_id)
 
-@router.delete("/delete/{project_id}", response_model=dict)
-@login_required
+@router.delete("/delete/{project_id}", response_model=dict, status_code=202, dependencies=[Depends(get_current_user)])
 async def delete_project(
     project_id: int,
     version_id: int,
@@ -67,20 +68,53 @@ async def delete_project(
 ):
     return await views.delete_project_view(db, request, project_id, version_id)
 
-@router.get("/all", response_model=dict)
-@login_required
-async def get_all_projects(
+@router.get("/delete/{project_id}/status", response_model=dict, dependencies=[Depends(get_current_user)])
+async def get_delete_status(
+    project_id: int,
+    version_id: int,
     request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    return await views.get_all_project_view(db, request)
+    return await views.get_delete_status_view(db, request, project_id, version_id)
 
-@router.get("/admin/user/{user_email}", response_model=dict)
-@login_required
-@role_required("admin")
+@router.get("/all", response_model=dict, dependencies=[Depends(get_current_user)])
+async def get_all_projects(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: int = Query(settings.PROJECT_PAGE_SIZE, ge=1, le=settings.PROJECT_PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Pass the returned next_cursor back as `cursor` for the following page
+    return await views.get_all_project_view(db, request, cursor, limit)
+
+@router.get("/admin/user/{user_email}", response_model=dict, dependencies=[Depends(require_role("admin"))])
 async def get_user_project(
     user_email: str,
     request: Request,
+    cursor: Optional[int] = None,
+    limit: int = Query(settings.PROJECT_PAGE_SIZE, ge=1, le=settings.PROJECT_PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_read_db)
+):
+    return await views.get_user_project_view(db, request, user_email, cursor, limit)
+
+@router.get("/uploads", response_model=dict, dependencies=[Depends(get_current_user)])
+async def get_upload_progress(
+    request: Request,
+):
+    return await views.get_upload_progress_view(request)
+
+@router.post("/upload/init", response_model=dict, dependencies=[Depends(get_current_user)])
+async def init_upload(
+    body: schemas.UploadInit,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    return await views.init_upload_view(db, request, body)
+
+@router.post("/upload/complete", response_model=dict, dependencies=[Depends(get_current_user)])
+async def complete_upload(
+    body: schemas.UploadComplete,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    return await views.get_user_project_view(db, request, user_email)
\ No newline at end of file
+    return await views.complete_upload_view(db, request, body)
\ No newline at end of file
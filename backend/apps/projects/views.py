@@ -1,73 +1,174 @@
 from config import settings
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, Response, Request, Form, UploadFile, File
-import aioboto3
-from sqlalchemy import select, exists, desc, update
-from .models import Project, ProjectVersion
+from sqlalchemy import select, exists, desc, update, insert, func, true
+from sqlalchemy.orm import aliased
+from .models import Project, ProjectVersion, ProjectFile, VersionStatus
+from .schemas import UploadInit, UploadComplete
+import asyncio
+import hashlib
+import math
+import os
+import tarfile
+from .storage import s3
+from .tasks import delete_project_version_task, delete_version_task_id
+from celery.result import AsyncResult
+from .archive import MAX_COPY_SIZE, iter_archive, store_entries
 from apps.users.models import Users
 
-class S3Service:
-    def __init__(self, bucket: str, region: str = "us-east-1"):
-        self.bucket = bucket
-        self.region = region
-        self.session = aioboto3.Session()
-
-    async def add(self, file_obj, key: str):
-        async with self.session.client("s3", region_name=self.region) as client:
-            await client.upload_fileobj(
-                Fileobj=file_obj,
-                Bucket=self.bucket,
-                Key=key,
-            )
+async def _allocate_version_no(db: AsyncSession, project_id: int) -> int:
+    """
+    Reserve the project's next version number.
+
+    The counter bump is committed straight away, so the project row is only
+    locked for this one statement rather than for the whole upload; a failed
+    upload just leaves a gap in the numbering.
+    """
+    version_no = await db.scalar(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(last_version_no=Project.last_version_no + 1)
+        .returning(Project.last_version_no)
+    )
+    await db.commit()
+    return version_no
 
-    async def remove(self, key: str):
-        async with self.session.client("s3", region_name=self.region) as client:
-            await client.delete_object(
-                Bucket=self.bucket,
-                Key=key,
-            )
+def _owned_project_query(project_id: int, owner_id):
+    return select(Project).where(Project.id == project_id, Project.owner_id == owner_id)
 
-    async def delete_prefix(self, prefix: str):
-        async with self.session.client("s3", region_name=self.region) as client:
-            paginator = client.get_paginator("list_objects_v2")
-
-            async for page in paginator.paginate(
-                Bucket=self.bucket,
-                Prefix=prefix
-            ):
-                objects = page.get("Contents", [])
-                if not objects:
-                    continue
-
-                await client.delete_objects(
-                    Bucket=self.bucket,
-                    Delete={
-                        "Objects": [
-                            {"Key": obj["Key"]} for obj in objects
-                        ],
-                        "Quiet": True,
-                    },
-                )
+def _project_name_taken_query(name: str):
+    return select(exists().where(Project.name == name))
+
+def _versions_query(project_id: int):
+    return (
+        select(ProjectVersion)
+        .where(ProjectVersion.project_id == project_id)
+        .order_by(ProjectVersion.version_no)
+    )
+
+def _previous_manifest_query(project_id: int):
+    """Files of the project's latest ready version."""
+    latest_ready = (
+        select(ProjectVersion.id)
+        .where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.status == VersionStatus.READY,
+        )
+        .order_by(desc(ProjectVersion.version_no))
+        .limit(1)
+        .scalar_subquery()
+    )
+    return (
+        select(ProjectFile.content_hash, ProjectFile.s3_key)
+        .where(ProjectFile.version_id == latest_ready)
+    )
 
-s3 = S3Service(bucket="aws-manas-generic-sites")
+async def _previous_manifest(db: AsyncSession, project_id: int) -> dict[str, str]:
+    """Content hash -> S3 key of every file in the project's latest ready version."""
+    result = await db.execute(_previous_manifest_query(project_id))
+    return {content_hash: s3_key for content_hash, s3_key in result}
+
+def _hash_file(file_obj) -> str:
+    """SHA-256 of a seekable file, which is left rewound (blocking)."""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    while chunk := file_obj.read(1024 * 1024):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+async def _store_upload(
+    file: UploadFile,
+    prefix: str,
+    archive: bool,
+    owner_id: str,
+    previous: dict[str, str] | None = None,
+) -> dict:
+    """
+    Put an uploaded file under a version prefix: as one object, or, for
+    archives, as one object per archive entry. Content that already exists
+    in `previous` is copied server side instead of re-uploaded. A single
+    file is already spooled by the request parser, so it is hashed before
+    deciding, then copied or streamed into a multipart upload.
+    """
+    if not archive:
+        path = os.path.basename(file.filename)
+        s3_key = f"{prefix}{path}"
+        content_hash = await asyncio.to_thread(_hash_file, file.file)
+        source = (previous or {}).get(content_hash)
+        if source and (file.size or 0) > MAX_COPY_SIZE:
+            source = None
+        if source:
+            await s3.copy(source, s3_key)
+        else:
+            await s3.add(
+                file.file,
+                s3_key,
+                content_type=file.content_type,
+                size=file.size,
+                owner_id=owner_id,
+            )
+        manifest = [{
+            "path": path,
+            "content_hash": content_hash,
+            "size": file.size,
+            "s3_key": s3_key,
+            "copied": source is not None,
+        }]
+    else:
+        try:
+            manifest = await store_entries(
+                s3,
+                iter_archive(file.file),
+                prefix,
+                concurrency=settings.S3_ARCHIVE_CONCURRENCY,
+                previous=previous,
+                owner_id=owner_id,
+            )
+        except tarfile.ReadError:
+            raise HTTPException(status_code=400, detail="File is not a zip or tar archive")
+    return {
+        "s3_key": prefix if archive else manifest[0]["s3_key"],
+        "size": sum(entry["size"] for entry in manifest),
+        "files": len(manifest),
+        "bytes_uploaded": sum(entry["size"] for entry in manifest if not entry["copied"]),
+        "bytes_copied": sum(entry["size"] for entry in manifest if entry["copied"]),
+        "manifest": manifest,
+    }
+
+async def _save_manifest(db: AsyncSession, version_id: int, manifest: list[dict]):
+    rows = [
+        {
+            "version_id": version_id,
+            "path": entry["path"],
+            "content_hash": entry["content_hash"],
+            "size": entry["size"],
+            "s3_key": entry["s3_key"],
+        }
+        for entry in manifest
+    ]
+    # Keep each INSERT well under the bind parameter limit
+    for start in range(0, len(rows), 1000):
+        await db.execute(insert(ProjectFile), rows[start:start + 1000])
 
 async def upload_project_view(
     db: AsyncSession,
     request: Request,
     name: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    archive: bool = False,
 ):
     # 1. Prevent duplicate project names
-    stmt = select(exists().where(Project.name == name))
-    project_exists = await db.scalar(stmt)
+    project_exists = await db.scalar(_project_name_taken_query(name))
 
     if project_exists:
         raise HTTPException(status_code=400, detail="Project name already exists")
 
     # 2. Upload to S3 (STREAMING)
-    s3_key = f"projects/{name}/v1/{file.filename}"
     try:
-        await s3.add(file.file, s3_key)
+        stored = await _store_upload(file, f"projects/{name}/v1/", archive, request.state.user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -81,6 +182,7 @@ async def upload_project_view(
         new_project = Project(
             name=name,
             owner_id=user_id,
+            last_version_no=1,
         )
         db.add(new_project)
         await db.flush()  # get new_project.id
@@ -88,16 +190,23 @@ async def upload_project_view(
         first_version = ProjectVersion(
             project_id=new_project.id,
             version="v1",
-            active=True,
+            version_no=1,
+            s3_key=stored["s3_key"],
+            size=stored["size"],
         )
         db.add(first_version)
+        await db.flush()  # get first_version.id
+        new_project.active_version_id = first_version.id
+        await _save_manifest(db, first_version.id, stored["manifest"])
 
         await db.commit()
 
         return {
             "message": "Project uploaded successfully",
             "project_id": new_project.id,
-            "s3_key": s3_key,
+            "s3_key": stored["s3_key"],
+            "files": stored["files"],
+            "bytes_uploaded": stored["bytes_uploaded"],
         }
 
     except Exception:
@@ -111,56 +220,54 @@ async def update_project_view(
     db: AsyncSession,
     request: Request,
     project_id: int,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    archive: bool = False,
 ):
     # 1. Validate project exists
     project = await db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == request.state.user_id
-        )
+        _owned_project_query(project_id, request.state.user_id)
     )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    # 2. Get latest active version
-    latest_version = await db.scalar(
-        select(ProjectVersion)
-        .where(
-            ProjectVersion.project_id == project_id
-        )
-        .order_by(desc(ProjectVersion.id))
-        .limit(1)
-    )
-    # 3. Compute next version
-    if latest_version:
-        latest_version.active = False
-        current_version_number = int(latest_version.version.replace("v", ""))
-        next_version = f"v{current_version_number + 1}"
-    else:
-        next_version = "v1"
-    
-    # 4. Upload file to S3
-    s3_key = f"projects/{project.name}/{next_version}/{file.filename}"
+    # 2-3. Reserve the next version number
+    version_no = await _allocate_version_no(db, project_id)
+    next_version = f"v{version_no}"
+
+    # 4. Upload file to S3, copying content unchanged since the last version
     try:
-        await s3.add(file.file, s3_key)
+        previous = await _previous_manifest(db, project_id)
+        stored = await _store_upload(
+            file, f"projects/{project.name}/{next_version}/", archive, request.state.user_id, previous
+        )
 
-        # 5. Create new version
+        # 5. Create new version and make it the active one
         new_version = ProjectVersion(
             project_id=project_id,
             version=next_version,
-            active=True,
+            version_no=version_no,
+            s3_key=stored["s3_key"],
+            size=stored["size"],
         )
 
         db.add(new_version)
+        await db.flush()  # get new_version.id
+        project.active_version_id = new_version.id
+        await _save_manifest(db, new_version.id, stored["manifest"])
         await db.commit()
 
         return {
             "message": "Project updated successfully",
             "project_id": project_id,
             "version": next_version,
-            "s3_key": s3_key,
+            "s3_key": stored["s3_key"],
+            "files": stored["files"],
+            "bytes_uploaded": stored["bytes_uploaded"],
+            "bytes_copied": stored["bytes_copied"],
         }
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -175,10 +282,7 @@ async def change_version_view(
     version_id: int
 ):
     project = await db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == request.state.user_id
-        )
+        _owned_project_query(project_id, request.state.user_id)
     )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -195,21 +299,11 @@ async def change_version_view(
             status_code=404,
             detail="Version does not exist for this project"
         )
+    if target_version.status != VersionStatus.READY:
+        raise HTTPException(status_code=409, detail="Version upload is not complete")
     try:
-        # 3. Deactivate all versions for this project
-        await db.execute(
-            update(ProjectVersion)
-            .where(ProjectVersion.project_id == project_id)
-            .values(active=False)
-        )
-
-        # 4. Activate requested version
-        await db.execute(
-            update(ProjectVersion)
-            .where(ProjectVersion.id == version_id)
-            .values(active=True)
-        )
-
+        # 3. Point the project at the requested version (one row)
+        project.active_version_id = version_id
         await db.commit()
 
         return {
@@ -233,20 +327,13 @@ async def get_versions_view(
 ):
     # 1. Validate project
     project = await db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == request.state.user_id
-        )
+        _owned_project_query(project_id, request.state.user_id)
     )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # 2. Fetch all versions
-    result = await db.scalars(
-        select(ProjectVersion)
-        .where(ProjectVersion.project_id == project_id)
-        .order_by(ProjectVersion.id)
-    )
+    result = await db.scalars(_versions_query(project_id))
     all_versions = result.all()
 
     if not all_versions:
@@ -259,7 +346,9 @@ async def get_versions_view(
             {
                 "id": v.id,
                 "version": v.version,
-                "active": v.active,
+                "version_no": v.version_no,
+                "active": v.id == project.active_version_id,
+                "status": v.status,
                 "created_at": v.created_at,
             }
             for v in all_versions
@@ -274,10 +363,7 @@ async def delete_project_view(
 ):
     # 1. Validate project
     project = await db.scalar(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == request.state.user_id
-        )
+        _owned_project_query(project_id, request.state.user_id)
     )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -288,38 +374,31 @@ async def delete_project_view(
             ProjectVersion.id == version_id,
             ProjectVersion.project_id == project_id
         )
+        .with_for_update()
     )
     if not version:
         raise HTTPException(
             status_code=404,
             detail="Version not found for this project"
         )
+    if version.status == VersionStatus.DELETING:
+        raise HTTPException(status_code=409, detail="Version is already being deleted")
     try:
-        # 3. Delete ALL files under version prefix
-        version_prefix = f"projects/{project.name}/{version.version}/"
-        await s3.delete_prefix(version_prefix)
-        
-        was_active = version.active
-        # 4. Delete DB record
-        await db.delete(version)
-        await db.flush()
-        # 5. Activate latest remaining version if needed
-        if was_active:
-            latest_version = await db.scalar(
-                select(ProjectVersion)
-                .where(ProjectVersion.project_id == project_id)
-                .order_by(desc(ProjectVersion.id))
+        # 3. Mark for deletion; storage cleanup happens in the background
+        version.status = VersionStatus.DELETING
+        # 4. Activate latest remaining version if needed
+        if project.active_version_id == version_id:
+            project.active_version_id = await db.scalar(
+                select(ProjectVersion.id)
+                .where(
+                    ProjectVersion.project_id == project_id,
+                    ProjectVersion.id != version_id,
+                    ProjectVersion.status == VersionStatus.READY,
+                )
+                .order_by(desc(ProjectVersion.version_no))
                 .limit(1)
             )
-            if latest_version:
-                latest_version.active = True
         await db.commit()
-
-        return {
-            "message": "Project version deleted successfully",
-            "project_id": project_id,
-            "deleted_version": version.version,
-        }
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -327,68 +406,297 @@ async def delete_project_view(
             detail=f"Delete failed: {str(e)}"
         )
 
-async def get_all_project_view(
+    # 5. Queue the storage cleanup (after commit, so the worker sees the status)
+    job_id = delete_version_task_id(version_id)
+    delete_project_version_task.apply_async(args=[version_id], task_id=job_id)
+
+    return {
+        "message": "Project version deletion started",
+        "project_id": project_id,
+        "version_id": version_id,
+        "deleted_version": version.version,
+        "job_id": job_id,
+    }
+
+async def get_delete_status_view(
     db: AsyncSession,
-    request: Request
+    request: Request,
+    project_id: int,
+    version_id: int
 ):
-    result = await db.scalars(
-        select(Project)
-        .where(Project.owner_id == request.state.user_id)
-        .order_by(Project.id.desc())
+    project = await db.scalar(
+        _owned_project_query(project_id, request.state.user_id)
     )
-    all_projects = result.all()
-    if not all_projects:
-        raise HTTPException(
-            status_code=404,
-            detail="No projects exist for you"
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    status = await db.scalar(
+        select(ProjectVersion.status).where(
+            ProjectVersion.id == version_id,
+            ProjectVersion.project_id == project_id
         )
+    )
+    # The row only disappears once its storage has been cleaned up
+    if status is None:
+        return {"version_id": version_id, "state": "completed"}
+    if status != VersionStatus.DELETING:
+        raise HTTPException(status_code=404, detail="Version is not being deleted")
+
+    job = AsyncResult(delete_version_task_id(version_id))
+    return {
+        "version_id": version_id,
+        "state": job.state.lower(),
+        "deleted_objects": job.info.get("deleted_objects", 0) if isinstance(job.info, dict) else 0,
+        "error": str(job.info) if job.failed() else None,
+    }
+
+def _list_projects_query(owner_id, cursor: int | None, limit: int):
+    """
+    One page of an owner's projects, newest first, each with its active
+    version, version count and latest deploy time, all from one query.
+    """
+    active = aliased(ProjectVersion)
+    # Per-project aggregate, evaluated once per row of the page
+    stats = (
+        select(
+            # Pending uploads and versions being deleted are not deployable
+            func.count().filter(ProjectVersion.status == VersionStatus.READY).label("version_count"),
+            func.max(ProjectVersion.created_at)
+            .filter(ProjectVersion.status == VersionStatus.READY)
+            .label("latest_deploy_at"),
+        )
+        .where(ProjectVersion.project_id == Project.id)
+        .lateral("stats")
+    )
+    statement = (
+        select(
+            Project.id,
+            Project.name,
+            Project.created_at,
+            Project.active_version_id,
+            active.version.label("active_version"),
+            stats.c.version_count,
+            stats.c.latest_deploy_at,
+        )
+        .outerjoin(active, active.id == Project.active_version_id)
+        .join(stats, true())
+        .where(Project.owner_id == owner_id)
+        .order_by(Project.id.desc())
+        .limit(limit + 1)
+    )
+    # Keyset pagination on (owner_id, id)
+    if cursor is not None:
+        statement = statement.where(Project.id < cursor)
+    return statement
+
+async def _list_projects(db: AsyncSession, owner_id, cursor: int | None, limit: int) -> dict:
+    """A page of `_list_projects_query`, with the cursor for the next one."""
+    rows = (await db.execute(_list_projects_query(owner_id, cursor, limit))).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     return {
         "projects": [
             {
-                "id": project.id,
-                "name": project.name,
+                "id": row.id,
+                "name": row.name,
+                "created_at": row.created_at,
+                "active_version_id": row.active_version_id,
+                "active_version": row.active_version,
+                "version_count": row.version_count,
+                "latest_deploy_at": row.latest_deploy_at,
             }
-            for project in all_projects
-        ]
+            for row in rows
+        ],
+        "next_cursor": rows[-1].id if has_more else None,
     }
 
+async def get_all_project_view(
+    db: AsyncSession,
+    request: Request,
+    cursor: int | None = None,
+    limit: int = settings.PROJECT_PAGE_SIZE,
+):
+    page = await _list_projects(db, request.state.user_id, cursor, limit)
+    if not page["projects"] and cursor is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No projects exist for you"
+        )
+    return page
+
 
 async def get_user_project_view(
     db: AsyncSession,
     request: Request,
-    user_email: str
+    user_email: str,
+    cursor: int | None = None,
+    limit: int = settings.PROJECT_PAGE_SIZE,
 ):
     # 1. Validate user by email
-    user = await db.scalar(
-        select(Users).where(Users.email == user_email)
+    user_id = await db.scalar(
+        select(Users.id).where(Users.email == user_email)
     )
-    if not user:
+    if not user_id:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # 2. Fetch user's projects
-    result = await db.scalars(
-        select(Project)
-        .where(Project.owner_id == user.id)
-        .order_by(Project.id.desc())
+    # 2. Fetch one page of the user's projects
+    return {
+        "user_email": user_email,
+        **await _list_projects(db, user_id, cursor, limit),
+    }
+
+async def get_upload_progress_view(request: Request):
+    return {"uploads": s3.uploads_for(request.state.user_id)}
+
+
+async def init_upload_view(
+    db: AsyncSession,
+    request: Request,
+    body: UploadInit,
+):
+    """
+    Phase one of a direct-to-storage upload: reserve the project/version and
+    hand back presigned URLs so the bytes never pass through this API.
+    """
+    user_id = request.state.user_id
+    filename = os.path.basename(body.filename)
+    if not filename:
+        raise HTTPException(status_code=400, detail="Invalid filename")
+
+    # 1. Reserve the project (new) or the next version (existing)
+    if body.project_id is not None:
+        project = await db.scalar(
+            _owned_project_query(body.project_id, user_id)
+        )
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        version_no = await _allocate_version_no(db, project.id)
+    elif body.name:
+        project_exists = await db.scalar(_project_name_taken_query(body.name))
+        if project_exists:
+            raise HTTPException(status_code=400, detail="Project name already exists")
+        project = Project(name=body.name, owner_id=user_id, last_version_no=1)
+        db.add(project)
+        await db.flush()  # get project.id
+        version_no = 1
+    else:
+        raise HTTPException(status_code=400, detail="Either name or project_id is required")
+    next_version = f"v{version_no}"
+
+    s3_key = f"projects/{project.name}/{next_version}/{filename}"
+    expires_in = settings.S3_PRESIGN_EXPIRES
+
+    # 2. Presign a single PUT, or a multipart upload for large files
+    try:
+        if body.size <= s3.part_size:
+            upload_id = None
+            upload = {
+                "method": "PUT",
+                "url": await s3.presign_put(s3_key, body.content_type, expires_in),
+            }
+        else:
+            upload_id = await s3.start_multipart(s3_key, body.content_type)
+            part_count = math.ceil(body.size / s3.part_size)
+            upload = {
+                "method": "multipart",
+                "part_size": s3.part_size,
+                "parts": await s3.presign_parts(s3_key, upload_id, part_count, expires_in),
+            }
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to prepare upload: {str(e)}")
+
+    # 3. Record the pending version
+    try:
+        version = ProjectVersion(
+            project_id=project.id,
+            version=next_version,
+            version_no=version_no,
+            status=VersionStatus.PENDING,
+            s3_key=s3_key,
+            size=body.size,
+            upload_id=upload_id,
+        )
+        db.add(version)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        if upload_id:
+            await s3.abort_multipart(s3_key, upload_id)
+        raise HTTPException(status_code=500, detail="Database transaction failed")
+
+    return {
+        "project_id": project.id,
+        "version_id": version.id,
+        "version": next_version,
+        "s3_key": s3_key,
+        "expires_in": expires_in,
+        **upload,
+    }
+
+async def complete_upload_view(
+    db: AsyncSession,
+    request: Request,
+    body: UploadComplete,
+):
+    """
+    Phase two: verify the uploaded object and activate the version.
+    """
+    # 1. Validate the pending version belongs to the caller
+    version = await db.scalar(
+        select(ProjectVersion)
+        .join(Project, Project.id == ProjectVersion.project_id)
+        .where(
+            ProjectVersion.id == body.version_id,
+            Project.owner_id == request.state.user_id
+        )
     )
+    if not version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    if version.status != VersionStatus.PENDING:
+        raise HTTPException(status_code=409, detail="Version upload already completed")
 
-    projects = result.all()
+    # 2. Assemble multipart uploads and verify the stored object
+    try:
+        if version.upload_id:
+            if not body.parts:
+                raise HTTPException(status_code=400, detail="Uploaded parts are required")
+            await s3.complete_multipart(
+                version.s3_key,
+                version.upload_id,
+                [{"PartNumber": part.part_number, "ETag": part.etag} for part in body.parts],
+            )
+        head = await s3.head(version.s3_key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Upload could not be completed: {str(e)}")
 
-    if not projects:
-        return {
-            "user_email": user_email,
-            "projects": []
-        }
+    if head is None:
+        raise HTTPException(status_code=400, detail="Uploaded object not found")
+    if head["ContentLength"] != version.size:
+        raise HTTPException(status_code=400, detail="Uploaded object size does not match")
+    if body.etag and head["ETag"].strip('"') != body.etag.strip('"'):
+        raise HTTPException(status_code=400, detail="Uploaded object ETag does not match")
+
+    # 3. Activate the version
+    try:
+        await db.execute(
+            update(Project)
+            .where(Project.id == version.project_id)
+            .values(active_version_id=version.id)
+        )
+        version.status = VersionStatus.READY
+        version.upload_id = None
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database transaction failed")
 
-    # 3. Serialize response
     return {
-        "user_email": user_email,
-        "projects": [
-            {
-                "id": project.id,
-                "name": project.name,
-                "created_at": project.created_at,
-            }
-            for project in projects
-        ]
-    }
\ No newline at end of file
+        "message": "Project version uploaded successfully",
+        "project_id": version.project_id,
+        "version_id": version.id,
+        "version": version.version,
+        "s3_key": version.s3_key,
+    }
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy.sql import func, text
+
+from apps.db.base import Base
+
+
+class EmailOutbox(Base):
+    """
+    Emails waiting to be delivered.
+
+    Rows are written in the same transaction as the user or invitation that
+    triggers them and drained in batches by `dispatch_email_outbox_task`.
+    `dispatched_at` is only set once the SMTP server accepted the message;
+    until then `attempts` and `next_attempt_at` drive retries with backoff.
+    """
+    __tablename__ = "email_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    dispatched_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        index=True,
+        nullable=True,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    # Null means ready now; also pushed forward while a batch is being delivered
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher only ever scans undelivered rows in id order
+        Index(
+            "ix_email_outbox_pending",
+            "id",
+            postgresql_where=text("dispatched_at IS NULL"),
+        ),
+    )
+
+
+def activation_email(email: str, activation_code: str, base_url: str) -> dict:
+    link = f"{base_url}/users/activate/email={email}/activation_code={activation_code}"
+    return {
+        "recipient": email,
+        "subject": "Activate your account",
+        "body": f"Welcome! Activate your account here: {link}",
+    }
+
+
+def invitation_email(email: str, link: str) -> dict:
+    return {
+        "recipient": email,
+        "subject": "You have been invited",
+        "body": f"You have been invited to join. Register here: {link}",
+    }
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from config import settings
+
+
+@dataclass
+class _Connection:
+    client: aiosmtplib.SMTP
+    sent: int = 0
+
+
+class SMTPPool:
+    """
+    Up to `size` persistent SMTP sessions shared by concurrent senders.
+
+    Each session is reused for up to `max_messages_per_connection` messages
+    before being recycled; sessions that error out are dropped and replaced
+    on the next checkout.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int,
+        max_messages_per_connection: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self._idle: list[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        return _Connection(client)
+
+    async def _discard(self, conn: _Connection):
+        try:
+            await conn.client.quit()
+        except Exception:
+            conn.client.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            try:
+                yield conn
+            except Exception:
+                await self._discard(conn)
+                raise
+            conn.sent += 1
+            if conn.sent >= self.max_messages_per_connection or not conn.client.is_connected:
+                await self._discard(conn)
+            else:
+                self._idle.append(conn)
+
+    async def close(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+def _is_permanent(error: Exception) -> bool:
+    # 5xx replies (bad recipient, rejected content) will not succeed on retry
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        # Raised for RCPT replies; each refused recipient carries its own code
+        return bool(error.recipients) and all(_is_permanent(refused) for refused in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPResponseException) and 500 <= error.code < 600
+
+
+class EmailDelivery:
+    """Sends batches of messages over an SMTPPool with per-message retry and backoff."""
+
+    def __init__(self, pool: SMTPPool, sender: str, max_retries: int, retry_backoff: float):
+        self.pool = pool
+        self.sender = sender
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def build_message(self, to: str, subject: str, body: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    async def send(self, message: EmailMessage):
+        attempt = 0
+        while True:
+            try:
+                async with self.pool.connection() as conn:
+                    await conn.client.send_message(message)
+                return
+            except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError) as e:
+                attempt += 1
+                if attempt > self.max_retries or _is_permanent(e):
+                    raise
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    async def send_many(self, messages: list[dict]) -> dict:
+        """
+        Send `messages` ({"to", "subject", "body"}) concurrently, bounded by
+        the pool size. Failures are reported per recipient (with the index of
+        the message and whether retrying could help), not raised.
+        """
+        started = time.monotonic()
+
+        async def deliver(index: int, item: dict):
+            try:
+                await self.send(self.build_message(item["to"], item["subject"], item["body"]))
+                return None
+            except Exception as e:
+                return {"index": index, "to": item["to"], "error": str(e), "permanent": _is_permanent(e)}
+
+        results = await asyncio.gather(*(deliver(i, item) for i, item in enumerate(messages)))
+        failed = [result for result in results if result is not None]
+        elapsed = time.monotonic() - started
+        return {
+            "sent": len(messages) - len(failed),
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "messages_per_second": round(len(messages) / elapsed, 2) if elapsed else None,
+        }
+
+    async def close(self):
+        await self.pool.close()
+
+
+def build_email_delivery() -> EmailDelivery:
+    pool = SMTPPool(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        size=settings.SMTP_CONCURRENCY,
+        max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+        username=settings.SMTP_USERNAME,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_USE_TLS,
+        start_tls=settings.SMTP_START_TLS,
+        timeout=settings.SMTP_TIMEOUT,
+    )
+    return EmailDelivery(
+        pool,
+        sender=settings.SMTP_FROM,
+        max_retries=settings.EMAIL_MAX_RETRIES,
+        retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    )
@@ -1,9 +1,175 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
 from celery import shared_task
-import time
+from sqlalchemy import select, update, or_
+from sqlalchemy.sql import func
+from config import settings
+from apps.db.worker import run_async, on_worker_shutdown, get_worker_sessionmaker
+from .models import EmailOutbox
+from .smtp import EmailDelivery, build_email_delivery
+
+logger = logging.getLogger(__name__)
+
+_delivery: EmailDelivery | None = None
+
+def _get_delivery() -> EmailDelivery:
+    # One SMTP connection pool per worker process, living on its event loop
+    global _delivery
+    if _delivery is None:
+        _delivery = build_email_delivery()
+    return _delivery
+
+@on_worker_shutdown
+async def _close_delivery():
+    global _delivery
+    if _delivery is not None:
+        await _delivery.close()
+        _delivery = None
 
 @shared_task
-def send_email_task(email: str):
-    # Your SMTP logic here
-    time.sleep(5)  # Simulate network delay
-    print(f"Sending email to {email}")
+def send_email_task(email: str, subject: str = "Notification", body: str = ""):
+    result = run_async(_get_delivery().send_many([{"to": email, "subject": subject, "body": body}]))
+    if result["failed"]:
+        raise RuntimeError(result["failed"][0]["error"])
     return {"status": "sent", "to": email}
+
+@shared_task(bind=True)
+def send_bulk_email_task(self, messages: list[dict]):
+    """
+    Send many {"to", "subject", "body"} messages over pooled SMTP sessions.
+    Recipients that failed for a transient reason are re-queued on their own.
+    """
+    result = run_async(_get_delivery().send_many(messages))
+    logger.info(
+        "Sent %s/%s emails (%s msg/s, %s failed)",
+        result["sent"], len(messages), result["messages_per_second"], len(result["failed"]),
+    )
+    retryable = [messages[f["index"]] for f in result["failed"] if not f["permanent"]]
+    if retryable:
+        if self.request.retries >= settings.EMAIL_TASK_MAX_RETRIES:
+            logger.error("Giving up on %s emails after %s retries", len(retryable), self.request.retries)
+        else:
+            raise self.retry(
+                args=[retryable],
+                countdown=settings.EMAIL_TASK_RETRY_DELAY * 2 ** self.request.retries,
+                max_retries=settings.EMAIL_TASK_MAX_RETRIES,
+            )
+    return result
+
+def _due_outbox_query(batch_size: int):
+    """The next batch of undelivered rows that are due, locked for claiming."""
+    return (
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.dispatched_at.is_(None),
+            EmailOutbox.attempts < settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            or_(EmailOutbox.next_attempt_at.is_(None), EmailOutbox.next_attempt_at <= func.now()),
+        )
+        .order_by(EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+async def _dispatch_outbox_logic():
+    """
+    Claims due outbox rows in batches and queues one deliver_outbox_task per
+    batch. A claim counts as an attempt and leases the rows for
+    EMAIL_OUTBOX_LEASE_SECONDS, so a batch that is lost in transit or dies
+    with its worker becomes due again on its own.
+
+    SKIP LOCKED lets several dispatchers drain the outbox side by side
+    without claiming the same rows.
+    """
+    batch_size = settings.EMAIL_OUTBOX_BATCH_SIZE
+    lease = timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    dispatched = 0
+    async with get_worker_sessionmaker()() as db:
+        while True:
+            try:
+                ids = (await db.execute(_due_outbox_query(batch_size))).scalars().all()
+                if not ids:
+                    await db.rollback()
+                    break
+
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(ids))
+                    .values(attempts=EmailOutbox.attempts + 1, next_attempt_at=func.now() + lease)
+                )
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                raise e
+            deliver_outbox_task.delay(list(ids))
+            dispatched += len(ids)
+    return f"Dispatched {dispatched} emails."
+
+@shared_task
+def dispatch_email_outbox_task():
+    """Drain the email outbox into the SMTP pipeline."""
+    return run_async(_dispatch_outbox_logic())
+
+async def _deliver_outbox_logic(ids: list[int]) -> dict:
+    """
+    Sends one claimed batch. Rows are marked dispatched only once the SMTP
+    server accepted them; the rest are rescheduled with exponential backoff,
+    or parked (attempts maxed out) when the server rejected them permanently.
+    """
+    SessionLocal = get_worker_sessionmaker()
+
+    # 1. Load what is still undelivered (a redelivered task may find it done)
+    async with SessionLocal() as db:
+        rows = (await db.execute(
+            select(EmailOutbox.id, EmailOutbox.recipient, EmailOutbox.subject, EmailOutbox.body, EmailOutbox.attempts)
+            .where(EmailOutbox.id.in_(ids), EmailOutbox.dispatched_at.is_(None))
+            .order_by(EmailOutbox.id)
+        )).all()
+    if not rows:
+        return {"sent": 0, "failed": 0}
+
+    # 2. Send
+    result = await _get_delivery().send_many([
+        {"to": row.recipient, "subject": row.subject, "body": row.body}
+        for row in rows
+    ])
+    failures = {f["index"]: f for f in result["failed"]}
+
+    # 3. Record the outcome of every row
+    now = datetime.now(timezone.utc)
+    delivered = [row.id for i, row in enumerate(rows) if i not in failures]
+    retries = []
+    for i, failure in failures.items():
+        row = rows[i]
+        if failure["permanent"]:
+            attempts, next_attempt_at = settings.EMAIL_OUTBOX_MAX_ATTEMPTS, None
+        else:
+            delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (row.attempts - 1)
+            attempts, next_attempt_at = row.attempts, now + timedelta(seconds=delay)
+        retries.append({
+            "id": row.id,
+            "attempts": attempts,
+            "next_attempt_at": next_attempt_at,
+            "last_error": failure["error"],
+        })
+
+    async with SessionLocal() as db:
+        if delivered:
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(delivered))
+                .values(dispatched_at=func.now(), next_attempt_at=None, last_error=None)
+            )
+        if retries:
+            # ORM bulk UPDATE by primary key: one executemany for the batch
+            await db.execute(update(EmailOutbox), retries)
+        await db.commit()
+
+    if retries:
+        logger.warning("%s of %s outbox emails not delivered; rescheduled", len(retries), len(rows))
+    return {"sent": len(delivered), "failed": len(retries)}
+
+@shared_task
+def deliver_outbox_task(ids: list[int]):
+    """Deliver one batch of claimed outbox rows."""
+    return run_async(_deliver_outbox_logic(ids))
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import redis.asyncio as redis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache where every entry carries its own expiry.
+
+    Lookups and inserts are O(1); the least recently used entry is evicted
+    once `maxsize` is reached and expired entries are dropped when read.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        """Store `value` until the unix timestamp `expires_at`."""
+        if self.maxsize <= 0 or expires_at <= time.time():
+            return
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def values(self) -> list:
+        now = time.time()
+        return [value for expires_at, value in self._data.values() if expires_at > now]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ProfileCache:
+    """
+    User profiles keyed by user id, held per process and optionally in Redis.
+
+    Entries are dropped explicitly when a user row changes (see the
+    `after_commit` hook in apps.users.models) and otherwise age out after
+    `ttl` seconds. With Redis, invalidations are also published on
+    `channel` so every process drops its local copy; while a process is not
+    subscribed it bypasses its local copies and reads Redis instead; if Redis
+    itself is unreachable every lookup is a miss and the caller reads the
+    database.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, redis_url: str | None = None, channel: str = "profile-invalidations"):
+        self.ttl = ttl
+        self.channel = channel
+        self._local = TTLCache(maxsize=maxsize)
+        self._redis = redis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._pending: set[asyncio.Task] = set()
+        self._listener: asyncio.Task | None = None
+        self._subscribed = False
+
+    def _key(self, user_id: str) -> str:
+        return f"profile:{user_id}"
+
+    def _local_cache_usable(self) -> bool:
+        if self._redis is None:
+            return True
+        if self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return self._subscribed
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Invalidations sent while unsubscribed were missed
+                    self._local.clear()
+                    self._subscribed = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._local.pop(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Profile invalidation subscription lost: %s", e)
+            finally:
+                self._subscribed = False
+            await asyncio.sleep(1)
+
+    async def get(self, user_id: str) -> dict | None:
+        profile = self._local.get(user_id) if self._local_cache_usable() else None
+        if profile is None and self._redis is not None:
+            try:
+                raw = await self._redis.get(self._key(user_id))
+            except redis.RedisError as e:
+                # A miss: the caller reads the database instead
+                logger.warning("Profile cache read failed: %s", e)
+                return None
+            if raw is not None:
+                profile = json.loads(raw)
+                self._local.set(user_id, profile, expires_at=time.time() + self.ttl)
+        return profile
+
+    async def set(self, user_id: str, profile: dict):
+        self._local.set(user_id, profile, expires_at=time.time() + self.ttl)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self._key(user_id), json.dumps(profile), ex=int(self.ttl))
+            except redis.RedisError as e:
+                logger.warning("Profile cache write failed: %s", e)
+
+    async def _invalidate_shared(self, user_id: str):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._key(user_id))
+            pipe.publish(self.channel, user_id)
+            await pipe.execute()
+
+    def invalidate(self, user_id: str):
+        """Drop a profile everywhere; safe to call from synchronous ORM event hooks."""
+        self._local.pop(user_id)
+        if self._redis is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            task = loop.create_task(self._invalidate_shared(user_id))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+profile_cache = ProfileCache(
+    maxsize=settings.PROFILE_CACHE_SIZE,
+    ttl=settings.PROFILE_CACHE_TTL,
+    redis_url=settings.REDIS_URL if settings.PROFILE_CACHE_REDIS else None,
+)
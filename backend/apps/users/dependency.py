@@ -1,33 +1,90 @@
+import hashlib
+from dataclasses import dataclass
+
 from fastapi import Request, HTTPException, Depends
 import jwt
 from config import settings
+from apps.users.cache import TTLCache
 
-async def get_current_user(request: Request):
-    # 1. Extract Token from Cookies
-    token = request.cookies.get("access_token")
-    if not token:
-        raise HTTPException(status_code=401, detail="Authentication required")
 
+@dataclass(frozen=True)
+class Principal:
+    id: str
+    email: str
+    role: str | None
+    exp: float
+
+
+# Verified access-token claims keyed by a digest of the raw token, so the
+# HMAC check and JSON decoding run once per token instead of once per request.
+_verified_tokens = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _decode_access_token(token: str) -> Principal:
     try:
-        # 2. Decode and Validate
         payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
+            token,
+            settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        
-        # 3. Extract data (Ensure your JWT creation logic includes 'id' and 'sub')
-        user_id = payload.get("id")
-        user_email = payload.get("sub")
-
-        if user_id is None or user_email is None:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-
-        # 4. Return a simple dictionary or a User object
-        # Returning a dictionary is faster; fetching the full User from DB is more robust.
-        return {"id": user_id, "email": user_email}
-
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except (jwt.InvalidTokenError, jwt.PyJWTError):
         raise HTTPException(status_code=401, detail="Invalid token")
+
+    user_id = payload.get("id")
+    user_email = payload.get("sub")
+    if user_id is None or user_email is None or payload.get("type", "access") != "access":
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+
+    return Principal(
+        id=user_id,
+        email=user_email,
+        role=payload.get("role"),
+        exp=float(payload["exp"]),
+    )
+
+
+def authenticate(request: Request) -> Principal:
+    """
+    Resolve the access token cookie into a Principal exactly once per request.
+
+    The result is stored on `request.state.principal` (plus the legacy
+    `user_id` / `user_email` attributes the views read), and verified claims
+    are cached until the token's own `exp`.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
+    token = request.cookies.get("access_token")
+    if not token:
+        raise HTTPException(status_code=401, detail="Authentication required")
+
+    key = _token_key(token)
+    principal = _verified_tokens.get(key)
+    if principal is None:
+        principal = _decode_access_token(token)
+        _verified_tokens.set(key, principal, expires_at=principal.exp)
+
+    request.state.principal = principal
+    request.state.user_id = principal.id
+    request.state.user_email = principal.email
+    return principal
+
+
+async def get_current_user(request: Request) -> Principal:
+    return authenticate(request)
+
+
+def require_role(*roles: str):
+    """Dependency factory that only lets the given roles through."""
+    async def dependency(principal: Principal = Depends(get_current_user)) -> Principal:
+        if principal.role not in roles:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        return principal
+    return dependency
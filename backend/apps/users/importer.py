@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from typing import IO, Iterator
+
+from pydantic import ValidationError
+
+from .schemas import UserImportRow
+from .security import BCRYPT_MAX_PASSWORD_BYTES, is_password_hash
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str | None, requested: str | None) -> str | None:
+    if requested:
+        return requested.lower()
+    suffix = (filename or "").rsplit(".", 1)[-1].lower()
+    if suffix == "csv":
+        return "csv"
+    if suffix in ("ndjson", "jsonl"):
+        return "ndjson"
+    return None
+
+
+def _raw_rows(file_obj: IO[bytes], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    text = io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        # Row numbers count the header as line 1
+        for line_no, record in enumerate(csv.DictReader(text), start=2):
+            # Empty CSV cells mean "not provided"
+            yield line_no, {key: value for key, value in record.items() if key and value not in ("", None)}, None
+        return
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def parse_import(file_obj: IO[bytes], fmt: str, max_rows: int) -> tuple[list[tuple[int, UserImportRow]], list[dict]]:
+    """
+    Parse and validate an import file (blocking; run it off the event loop).
+    Returns the valid rows with their line numbers, and per-line errors.
+    Repeated emails within the file keep the first occurrence.
+    """
+    rows: list[tuple[int, UserImportRow]] = []
+    errors: list[dict] = []
+    seen: set[str] = set()
+    for count, (line_no, record, error) in enumerate(_raw_rows(file_obj, fmt), start=1):
+        if count > max_rows:
+            errors.append({"row": line_no, "email": None, "error": f"Import is limited to {max_rows} rows"})
+            break
+        if error:
+            errors.append({"row": line_no, "email": None, "error": error})
+            continue
+        try:
+            row = UserImportRow.model_validate(record)
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"]) or "row"
+            errors.append({"row": line_no, "email": record.get("email"), "error": f"{field}: {first['msg']}"})
+            continue
+        if bool(row.password) == bool(row.password_hash):
+            errors.append({"row": line_no, "email": row.email, "error": "Provide exactly one of password or password_hash"})
+            continue
+        if row.password and len(row.password.encode("utf-8")) > BCRYPT_MAX_PASSWORD_BYTES:
+            errors.append({"row": line_no, "email": row.email, "error": f"password is longer than {BCRYPT_MAX_PASSWORD_BYTES} bytes"})
+            continue
+        if row.password_hash and not is_password_hash(row.password_hash):
+            errors.append({"row": line_no, "email": row.email, "error": "password_hash is not a bcrypt hash"})
+            continue
+        if row.email in seen:
+            errors.append({"row": line_no, "email": row.email, "error": "Duplicate email in file"})
+            continue
+        seen.add(row.email)
+        rows.append((line_no, row))
+    return rows, errors
@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     event,
@@ -15,14 +16,19 @@ from sqlalchemy import (
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
+    Session,
     mapped_column,
+    object_session,
     relationship,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.dialects.postgresql import UUID
 
 import uuid_utils
 from apps.db.base import Base
+from apps.users.cache import profile_cache
+from apps.send_email.models import EmailOutbox, activation_email
+from config import settings
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from apps.projects.models import Project
@@ -41,7 +47,6 @@ class Users(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
         default=uuid_utils.uuid7,
     )
 
@@ -96,7 +101,7 @@ class Users(Base):
 class Activations(Base):
     __tablename__ = "activations"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -128,23 +133,55 @@ class Activations(Base):
         back_populates="activations",
     )
 
+    __table_args__ = (
+        # Retention only ever looks at used codes
+        Index(
+            "ix_activations_used_updated_at",
+            "updated_at",
+            postgresql_where=text("is_used"),
+        ),
+    )
+
 
 @event.listens_for(Users, "after_insert")
 def create_activation_token(mapper, connection, target):
     if getattr(target, "_skip_activation", False):
         return
 
+    activation_code = str(uuid.uuid4())
     stmt = insert(Activations.__table__).values(
         user_id=target.id,
-        activation_code=str(uuid.uuid4()),
+        activation_code=activation_code,
     )
     connection.execute(stmt)
 
+    # Queue the activation email in the same transaction
+    connection.execute(
+        insert(EmailOutbox.__table__).values(
+            **activation_email(target.email, activation_code, settings.APP_BASE_URL)
+        )
+    )
+
+
+@event.listens_for(Users, "after_update")
+@event.listens_for(Users, "after_delete")
+def mark_profile_stale(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_profiles", set()).add(str(target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_stale_profiles(session):
+    # Only drop cached profiles once the change is visible to other readers
+    for user_id in session.info.pop("stale_profiles", ()):
+        profile_cache.invalidate(user_id)
+
 
 class TokenBlacklist(Base):
     __tablename__ = "token_blacklist"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     jti: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(
@@ -153,6 +190,7 @@ class TokenBlacklist(Base):
     )
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        index=True,
         nullable=False,
     )
 
@@ -168,7 +206,7 @@ class TokenBlacklist(Base):
 class Invitation(Base):
     __tablename__ = "invitations"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     email: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
     role: Mapped[str] = mapped_column(String(50), nullable=False)
 
@@ -191,6 +229,7 @@ class Invitation(Base):
     )
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        index=True,
         nullable=False,
     )
 
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from datetime import datetime
+from typing import List
+from .models import UserRole
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -27,3 +29,24 @@ class InvitationCreate(BaseModel):
     email: EmailStr
     role: str
     model_config = ConfigDict(from_attributes=True)
+
+class InvitationBatchCreate(BaseModel):
+    invitations: List[InvitationCreate] = Field(min_length=1, max_length=1000)
+
+class UserListItem(BaseModel):
+    id: str
+    email: str
+    role: str
+    is_active: bool
+
+class UserListPage(BaseModel):
+    users: List[UserListItem]
+    next_cursor: str | None
+
+class UserImportRow(BaseModel):
+    email: EmailStr
+    # Either a plain password (hashed on import) or an existing bcrypt hash
+    password: str | None = None
+    password_hash: str | None = None
+    role: UserRole = UserRole.USER
+    is_active: bool = False
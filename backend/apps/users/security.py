@@ -1,4 +1,15 @@
+import asyncio
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
 import bcrypt
+from fastapi import HTTPException
+
+from config import settings
 
 def hash_password(password: str) -> str:
     """Hash a password for registration."""
@@ -13,6 +24,194 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a login attempt against the stored hash."""
     return bcrypt.checkpw(
-        plain_password.encode('utf-8'), 
+        plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
     )
+
+
+# bcrypt only reads this many bytes of a password, and bcrypt >= 5 rejects longer ones
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash a batch of passwords in one worker call."""
+    return [hash_password(password) for password in passwords]
+
+# $2b$<cost>$<22 char salt><31 char digest>
+_BCRYPT_HASH = re.compile(r"^\$2[abxy]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+def is_password_hash(value: str) -> bool:
+    """True for a well-formed bcrypt hash (e.g. one exported from another system)."""
+    return bool(_BCRYPT_HASH.match(value))
+
+
+def _timed_call(func, submitted_at: float, *args):
+    """Run `func` in the worker and report when it started and how long it took.
+
+    Wall clock time is used because the worker may be another process.
+    """
+    started_at = time.time()
+    result = func(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+
+@dataclass
+class HasherMetrics:
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    in_flight: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    hash_time_total: float = 0.0
+    hash_time_max: float = 0.0
+
+    def snapshot(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "in_flight": self.in_flight,
+            "queue_wait_avg_ms": round(self.queue_wait_total / completed * 1000, 3),
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 3),
+            "hash_time_avg_ms": round(self.hash_time_total / completed * 1000, 3),
+            "hash_time_max_ms": round(self.hash_time_max * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt work on a bounded executor so it never blocks the event loop.
+
+    bcrypt releases the GIL, so the default thread pool scales with cores;
+    a process pool can be selected for deployments that prefer isolation.
+    Calls beyond `workers + max_queue` are rejected with 503 instead of
+    piling up behind a slow pool.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        timeout: float,
+        executor: str = "thread",
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.executor_kind = executor
+        self.metrics = HasherMetrics()
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        # Forking a process that runs an event loop and holds
+                        # open sockets and locks is unsafe; start clean workers
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="password-hasher",
+                        )
+        return self._executor
+
+    def _release(self, loop: asyncio.AbstractEventLoop):
+        def release():
+            self.metrics.in_flight -= 1
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # The loop is already closed (shutdown); nothing left to account for
+            pass
+
+    async def run(self, func, *args):
+        if self.metrics.in_flight >= self.workers + self.max_queue:
+            self.metrics.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+        self.metrics.submitted += 1
+        self.metrics.in_flight += 1
+        loop = asyncio.get_running_loop()
+        job = self._get_executor().submit(_timed_call, func, time.time(), *args)
+        # A job stays in flight until the executor is really done with it,
+        # even if the caller has already given up waiting
+        job.add_done_callback(lambda _: self._release(loop))
+        try:
+            # wait_for cancels the job on timeout, which drops it if it is
+            # still queued; a running bcrypt round finishes in the background
+            # and its result is discarded.
+            result, queue_wait, hash_time = await asyncio.wait_for(
+                asyncio.wrap_future(job), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.metrics.timed_out += 1
+            raise HTTPException(status_code=503, detail="Password hashing timed out")
+
+        self.metrics.completed += 1
+        self.metrics.queue_wait_total += queue_wait
+        self.metrics.queue_wait_max = max(self.metrics.queue_wait_max, queue_wait)
+        self.metrics.hash_time_total += hash_time
+        self.metrics.hash_time_max = max(self.metrics.hash_time_max, hash_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: list[str], batch_size: int = 32) -> list[str]:
+        """
+        Hash many passwords, `batch_size` per worker call to amortise the
+        executor round trip. Bypasses the queue limit and timeout, which are
+        meant for interactive requests.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        # Small imports still spread over every worker
+        batch_size = max(1, min(batch_size, -(-len(passwords) // self.workers)))
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(executor, hash_passwords, passwords[start:start + batch_size])
+            for start in range(0, len(passwords), batch_size)
+        ))
+        return [hashed for batch in batches for hashed in batch]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+)
+
+
+# Bulk imports get their own process pool so they never starve logins
+import_password_hasher = PasswordHasher(
+    workers=settings.USER_IMPORT_HASH_WORKERS,
+    max_queue=0,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+    executor="process",
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password worker pool."""
+    return await password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool."""
+    return await password_hasher.verify(plain_password, hashed_password)
@@ -2,7 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import Users, UserRole
-from .security import hash_password
+from .security import hash_password_async
 import os
 
 DEFAULT_ADMIN_EMAIL = os.getenv("DEFAULT_ADMIN_EMAIL")
@@ -19,7 +19,7 @@ async def create_default_admin(db: AsyncSession):
 
     admin_user = Users(
         email=DEFAULT_ADMIN_EMAIL,
-        password=hash_password(DEFAULT_ADMIN_PASSWORD),
+        password=await hash_password_async(DEFAULT_ADMIN_PASSWORD),
         role=UserRole.ADMIN,
         is_active=True,
     )
@@ -0,0 +1,341 @@
+import json
+import secrets
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+import redis.asyncio as redis
+
+from config import settings
+from apps.users.cache import TTLCache
+
+
+def _ttl_ms(expires_at: datetime) -> int:
+    return max(int((expires_at.timestamp() - time.time()) * 1000), 1)
+
+
+def _event(kind: str, **fields) -> dict:
+    fields["event"] = kind
+    fields["at"] = time.time()
+    return fields
+
+
+class SessionStore(ABC):
+    """
+    Active refresh-token sessions keyed by the refresh token `jti`.
+
+    Every mutation also appends an audit event that is persisted to the
+    `token_blacklist` table in batches by `flush_session_audit_task`, so the
+    request path never waits on a Postgres commit.
+    """
+
+    @abstractmethod
+    async def issue(self, jti: str, user_id: str, expires_at: datetime):
+        ...
+
+    @abstractmethod
+    async def rotate(
+        self,
+        old_jti: str,
+        new_jti: str,
+        user_id: str,
+        expires_at: datetime,
+        result: str,
+        grace: float,
+    ) -> str | None:
+        """
+        Atomically replace `old_jti` with `new_jti` and remember `result` for
+        `grace` seconds under the old jti.
+
+        Returns `result` when this call performed the rotation, the result of
+        the rotation that already happened within the grace window, or None
+        if `old_jti` is neither active nor recently rotated.
+        """
+
+    @abstractmethod
+    async def revoke(self, jti: str):
+        ...
+
+    @abstractmethod
+    async def adopt(self, jti: str, user_id: str, expires_at: datetime) -> bool:
+        """
+        Load a session that only exists in `token_blacklist` (issued before
+        this store was deployed). Refused for a jti this store has already
+        rotated or revoked, since its row may just not be flushed yet.
+        """
+
+    @abstractmethod
+    async def claim_audit(self, limit: int) -> list[dict]:
+        """
+        Move up to `limit` of the oldest audit events into a pending batch and
+        return it. A batch left unacknowledged by a crashed flush is returned
+        again first, so events are never lost (persisting them is idempotent).
+        """
+
+    @abstractmethod
+    async def ack_audit(self):
+        """Drop the pending batch once it has been persisted."""
+
+    @abstractmethod
+    async def lock_audit(self, ttl: float) -> str | None:
+        """Take the flush lock for up to `ttl` seconds; None if another flush holds it."""
+
+    @abstractmethod
+    async def unlock_audit(self, token: str):
+        ...
+
+    async def close(self):
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local stand-in used for tests and single-process development."""
+
+    def __init__(self):
+        self._sessions: dict[str, tuple[str, float]] = {}
+        self._rotated = TTLCache(maxsize=10000)
+        self._rotated_from = TTLCache(maxsize=10000)
+        self._retired = TTLCache(maxsize=100000)
+        self._audit: list[dict] = []
+        self._pending: list[dict] = []
+        self._flush_lock: str | None = None
+
+    def _get(self, jti: str):
+        entry = self._sessions.get(jti)
+        if entry and entry[1] <= time.time():
+            del self._sessions[jti]
+            return None
+        return entry
+
+    async def issue(self, jti: str, user_id: str, expires_at: datetime):
+        self._sessions[jti] = (user_id, expires_at.timestamp())
+        self._audit.append(_event("issued", jti=jti, user_id=user_id, expires_at=expires_at.timestamp()))
+
+    async def rotate(self, old_jti, new_jti, user_id, expires_at, result, grace):
+        entry = self._get(old_jti)
+        if entry is None or entry[0] != user_id:
+            return self._rotated.get(old_jti)
+        del self._sessions[old_jti]
+        self._retired.set(old_jti, True, expires_at=entry[1])
+        self._sessions[new_jti] = (user_id, expires_at.timestamp())
+        self._rotated.set(old_jti, result, expires_at=time.time() + grace)
+        self._rotated_from.set(new_jti, old_jti, expires_at=time.time() + grace)
+        self._audit.append(_event("rotated", jti=old_jti, new_jti=new_jti, expires_at=expires_at.timestamp()))
+        return result
+
+    async def revoke(self, jti: str):
+        entry = self._sessions.pop(jti, None)
+        expires = entry[1] if entry else time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        self._retired.set(jti, True, expires_at=expires)
+        # Neither this jti nor the one it replaced may still be answered from the grace window
+        previous = self._rotated_from.pop(jti)
+        if previous is not None:
+            self._rotated.pop(previous)
+        self._rotated.pop(jti)
+        # Also covers sessions only known to token_blacklist
+        self._audit.append(_event("revoked", jti=jti))
+
+    async def adopt(self, jti, user_id, expires_at):
+        if self._retired.get(jti) or self._get(jti) is not None:
+            return False
+        self._sessions[jti] = (user_id, expires_at.timestamp())
+        return True
+
+    async def claim_audit(self, limit: int) -> list[dict]:
+        if not self._pending:
+            self._pending, self._audit = self._audit[:limit], self._audit[limit:]
+        return list(self._pending)
+
+    async def ack_audit(self):
+        self._pending = []
+
+    async def lock_audit(self, ttl: float) -> str | None:
+        if self._flush_lock is not None:
+            return None
+        self._flush_lock = secrets.token_hex(8)
+        return self._flush_lock
+
+    async def unlock_audit(self, token: str):
+        if self._flush_lock == token:
+            self._flush_lock = None
+
+
+# KEYS: old session, new session, audit list, rotation result of the old session,
+#       retired marker of the old session, predecessor link of the new session
+# ARGV: user id, new ttl (ms), audit event, rotation result, grace (ms), old jti
+ROTATE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if not owner or owner ~= ARGV[1] then
+    return redis.call('GET', KEYS[4])
+end
+-- Remember the old jti for its remaining lifetime so adopt() cannot revive it
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl > 0 then
+    redis.call('SET', KEYS[5], '1', 'PX', ttl)
+end
+redis.call('DEL', KEYS[1])
+redis.call('SET', KEYS[2], ARGV[1], 'PX', ARGV[2])
+redis.call('SET', KEYS[4], ARGV[4], 'PX', ARGV[5])
+-- Lets revoke() find and drop the grace result while the old cookie replays it
+redis.call('SET', KEYS[6], ARGV[6], 'PX', ARGV[5])
+redis.call('RPUSH', KEYS[3], ARGV[3])
+return ARGV[4]
+"""
+
+# KEYS: session, audit list, retired marker, own rotation result, predecessor link,
+#       [rotation result of the predecessor]
+# ARGV: audit event, default marker ttl (ms), [predecessor jti]
+REVOKE_SCRIPT = """
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl <= 0 then
+    ttl = tonumber(ARGV[2])
+end
+redis.call('SET', KEYS[3], '1', 'PX', ttl)
+redis.call('DEL', KEYS[1])
+-- Neither this jti nor the one it replaced may still be answered from the grace window.
+-- The predecessor is resolved by the caller so its key is declared up front.
+if KEYS[6] and redis.call('GET', KEYS[5]) == ARGV[3] then
+    redis.call('DEL', KEYS[6])
+end
+redis.call('DEL', KEYS[4], KEYS[5])
+-- Also sent for sessions only known to token_blacklist
+redis.call('RPUSH', KEYS[2], ARGV[1])
+return 1
+"""
+
+# KEYS: session, retired marker
+# ARGV: user id, ttl (ms)
+ADOPT_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2], 'NX') then
+    return 1
+end
+return 0
+"""
+
+# KEYS: audit list, pending batch
+# ARGV: batch size
+CLAIM_AUDIT_SCRIPT = """
+local pending = redis.call('LRANGE', KEYS[2], 0, -1)
+if #pending > 0 then
+    return pending
+end
+local events = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+for i = 1, #events, 500 do
+    redis.call('RPUSH', KEYS[2], unpack(events, i, math.min(i + 499, #events)))
+end
+redis.call('LTRIM', KEYS[1], #events, -1)
+return events
+"""
+
+# KEYS: lock
+# ARGV: owner token
+UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions live in Redis with native TTLs; rotation is a single Lua call."""
+
+    def __init__(self, url: str, prefix: str = "auth:"):
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.audit_key = f"{prefix}session-audit"
+        self.pending_audit_key = f"{prefix}session-audit:pending"
+        self.audit_lock_key = f"{prefix}session-audit:lock"
+        self._rotate = self.redis.register_script(ROTATE_SCRIPT)
+        self._revoke = self.redis.register_script(REVOKE_SCRIPT)
+        self._adopt = self.redis.register_script(ADOPT_SCRIPT)
+        self._claim_audit = self.redis.register_script(CLAIM_AUDIT_SCRIPT)
+        self._unlock = self.redis.register_script(UNLOCK_SCRIPT)
+
+    def _key(self, jti: str) -> str:
+        return f"{self.prefix}session:{jti}"
+
+    def _retired_key(self, jti: str) -> str:
+        return f"{self.prefix}retired:{jti}"
+
+    async def issue(self, jti: str, user_id: str, expires_at: datetime):
+        event = _event("issued", jti=jti, user_id=user_id, expires_at=expires_at.timestamp())
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(jti), user_id, px=_ttl_ms(expires_at))
+            pipe.rpush(self.audit_key, json.dumps(event))
+            await pipe.execute()
+
+    async def rotate(self, old_jti, new_jti, user_id, expires_at, result, grace):
+        event = _event("rotated", jti=old_jti, new_jti=new_jti, expires_at=expires_at.timestamp())
+        return await self._rotate(
+            keys=[
+                self._key(old_jti),
+                self._key(new_jti),
+                self.audit_key,
+                f"{self.prefix}rotated:{old_jti}",
+                self._retired_key(old_jti),
+                f"{self.prefix}rotated-from:{new_jti}",
+            ],
+            args=[user_id, _ttl_ms(expires_at), json.dumps(event), result, max(int(grace * 1000), 1), old_jti],
+        )
+
+    async def revoke(self, jti: str):
+        keys = [
+            self._key(jti),
+            self.audit_key,
+            self._retired_key(jti),
+            f"{self.prefix}rotated:{jti}",
+            f"{self.prefix}rotated-from:{jti}",
+        ]
+        args = [json.dumps(_event("revoked", jti=jti)), settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400 * 1000]
+        # The link only exists while the grace window is open, and the script
+        # re-checks it, so reading it first cannot drop the wrong result
+        previous = await self.redis.get(keys[4])
+        if previous is not None:
+            keys.append(f"{self.prefix}rotated:{previous}")
+            args.append(previous)
+        await self._revoke(keys=keys, args=args)
+
+    async def adopt(self, jti, user_id, expires_at):
+        adopted = await self._adopt(
+            keys=[self._key(jti), self._retired_key(jti)],
+            args=[user_id, _ttl_ms(expires_at)],
+        )
+        return adopted == 1
+
+    async def claim_audit(self, limit: int) -> list[dict]:
+        raw_events = await self._claim_audit(
+            keys=[self.audit_key, self.pending_audit_key],
+            args=[limit],
+        )
+        return [json.loads(raw) for raw in raw_events]
+
+    async def ack_audit(self):
+        await self.redis.delete(self.pending_audit_key)
+
+    async def lock_audit(self, ttl: float) -> str | None:
+        token = secrets.token_hex(8)
+        acquired = await self.redis.set(self.audit_lock_key, token, px=max(int(ttl * 1000), 1), nx=True)
+        return token if acquired else None
+
+    async def unlock_audit(self, token: str):
+        await self._unlock(keys=[self.audit_lock_key], args=[token])
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+def build_session_store() -> SessionStore:
+    if settings.SESSION_STORE_BACKEND == "memory":
+        return InMemorySessionStore()
+    return RedisSessionStore(settings.REDIS_URL)
+
+
+session_store = build_session_store()
+
+
+def audit_timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
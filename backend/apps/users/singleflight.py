@@ -0,0 +1,25 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one execution.
+
+    The first caller runs `func`; everyone arriving while it is in flight
+    awaits the same task and receives the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # shield so one caller disconnecting does not cancel the shared work
+        return await asyncio.shield(task)
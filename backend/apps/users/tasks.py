@@ -1,33 +1,128 @@
 from celery import shared_task
-from datetime import datetime, timezone
-from sqlalchemy import delete
+from datetime import timedelta
+from sqlalchemy import delete, update, bindparam
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import AsyncSessionLocal
-from .models import TokenBlacklist
-import asyncio
+from apps.db.worker import run_async, get_worker_sessionmaker
+from config import settings
+from apps.db.retention import RetentionPolicy, run_retention
+from apps.send_email.models import EmailOutbox
+from .models import TokenBlacklist, Invitation, Activations
+from .sessions import SessionStore, build_session_store, audit_timestamp
+import uuid
 
 
+def _retention_policies() -> list[RetentionPolicy]:
+    batch_size = settings.RETENTION_BATCH_SIZE
+    return [
+        RetentionPolicy(TokenBlacklist, TokenBlacklist.expires_at, batch_size=batch_size),
+        RetentionPolicy(Invitation, Invitation.expires_at, batch_size=batch_size),
+        # Activations never expire on their own; only used codes are purged
+        RetentionPolicy(
+            Activations,
+            Activations.updated_at,
+            keep_for=timedelta(days=settings.ACTIVATION_RETENTION_DAYS),
+            conditions=(Activations.is_used == True,),
+            batch_size=batch_size,
+        ),
+        RetentionPolicy(
+            EmailOutbox,
+            EmailOutbox.dispatched_at,
+            keep_for=timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS),
+            batch_size=batch_size,
+        ),
+    ]
+
 async def _remove_tokens_logic():
     """
-    Periodically deletes tokens from the blacklist that have already expired.
+    Periodically deletes expired sessions, invitations and used activation codes.
     """
-    async with AsyncSessionLocal() as db:
-        try:
-            # Create a delete statement for tokens where expires_at < now
-            statement = (
-                delete(TokenBlacklist)
-                .where(TokenBlacklist.created_at < datetime.now(timezone.utc))
-            )
-            
-            # Execute the deletion
-            result = await db.execute(statement)
-            await db.commit()
-            return f"Removed {result.rowcount} expired tokens."
-        except Exception as e:
-            await db.rollback()
-            raise e
+    removed = await run_retention(get_worker_sessionmaker(), _retention_policies())
+    return {"removed": removed}
+
+async def _apply_session_events(db: AsyncSession, events: list[dict]):
+    """Persist one batch of session events: inserts, then rotations in order, then revocations."""
+    table = TokenBlacklist.__table__
+    issued = [
+        {
+            "jti": e["jti"],
+            "user_id": uuid.UUID(e["user_id"]),
+            "expires_at": audit_timestamp(e["expires_at"]),
+        }
+        for e in events if e["event"] == "issued"
+    ]
+    rotated = [
+        {
+            "old_jti": e["jti"],
+            "new_jti": e["new_jti"],
+            "new_expires_at": audit_timestamp(e["expires_at"]),
+        }
+        for e in events if e["event"] == "rotated"
+    ]
+    revoked = [e["jti"] for e in events if e["event"] == "revoked"]
+
+    if issued:
+        await db.execute(
+            insert(table).values(issued).on_conflict_do_nothing(index_elements=["jti"])
+        )
+    if rotated:
+        await db.execute(
+            update(table)
+            .where(table.c.jti == bindparam("old_jti"))
+            .values(jti=bindparam("new_jti"), expires_at=bindparam("new_expires_at")),
+            rotated,
+        )
+    if revoked:
+        await db.execute(delete(table).where(table.c.jti.in_(revoked)))
+
+# Longer than any realistic flush; only matters if a worker dies holding it
+SESSION_AUDIT_LOCK_SECONDS = 300
+
+_session_store: SessionStore | None = None
+
+def _get_session_store() -> SessionStore:
+    # One store (and Redis connection pool) per worker process, bound to its loop
+    global _session_store
+    if _session_store is None:
+        _session_store = build_session_store()
+    return _session_store
+
+async def _flush_session_audit_logic():
+    """
+    Drains the session store's audit events into token_blacklist, one
+    transaction per batch. Only one flush runs at a time, and a claimed
+    batch is only acknowledged after its commit.
+    """
+    store = _get_session_store()
+    lock = await store.lock_audit(ttl=SESSION_AUDIT_LOCK_SECONDS)
+    if lock is None:
+        return "Another flush is running."
+    batch_size = settings.SESSION_AUDIT_BATCH_SIZE
+    flushed = 0
+    try:
+        async with get_worker_sessionmaker()() as db:
+            while True:
+                events = await store.claim_audit(batch_size)
+                if not events:
+                    break
+                try:
+                    await _apply_session_events(db, events)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    raise e
+                await store.ack_audit()
+                flushed += len(events)
+    finally:
+        await store.unlock_audit(lock)
+    return f"Persisted {flushed} session events."
 
 @shared_task
 def remove_blacklisted_token_task():
-    """Synchronous Celery task that runs the async logic."""
-    return asyncio.run(_remove_tokens_logic())
\ No newline at end of file
+    """Synchronous Celery task that runs the retention policies."""
+    return run_async(_remove_tokens_logic())
+
+@shared_task
+def flush_session_audit_task():
+    """Write-behind of refresh-session changes from the session store to Postgres."""
+    return run_async(_flush_session_audit_logic())
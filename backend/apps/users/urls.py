@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, Response, Request
+from fastapi import APIRouter, Depends, Response, Request, Query, UploadFile, File, Form
+from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
+from database import get_db, get_read_db
 from . import views, schemas
-from apps.users.decorators import login_required, role_required
+from apps.users.dependency import get_current_user, require_role
 from typing import Optional, List
+import uuid
 
 router = APIRouter()
 
@@ -15,6 +17,12 @@ async def create_user(
 ):
     return await views.create_user_view(user, db, invitation_token)
 
+# The link in the activation email opens a confirmation page; only its POST
+# activates, so mail scanners prefetching the link cannot activate accounts
+@router.get("/activate/email={user_email}/activation_code={activation_code}", response_class=HTMLResponse)
+async def confirm_activation(user_email: str, activation_code: str):
+    return views.activation_confirm_page_view(user_email)
+
 @router.post("/activate/email={user_email}/activation_code={activation_code}", response_model=dict)
 async def activate_user(
     user_email: str, 
@@ -31,11 +39,10 @@ async def login_user(
 ):
     return await views.login_user_view(user, response, db)
 
-@router.get("/info", response_model=schemas.UserResponse)
-@login_required
+@router.get("/info", response_model=schemas.UserResponse, dependencies=[Depends(get_current_user)])
 async def get_users(
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     return await views.get_users_view(db, request)
 
@@ -47,8 +54,7 @@ async def refresh_token(
 ):
     return await views.refresh_token_view(db, request, response)
 
-@router.post("/logout", response_model=dict)
-@login_required
+@router.post("/logout", response_model=dict, dependencies=[Depends(get_current_user)])
 async def logout_user(
     request: Request,
     response: Response,
@@ -56,9 +62,7 @@ async def logout_user(
 ):
     return await views.logout_user_view(db, request, response)
 
-@router.post("/admin/invite", response_model=dict)
-@login_required
-@role_required(["admin"])
+@router.post("/admin/invite", response_model=dict, dependencies=[Depends(require_role("admin"))])
 async def invite_user(
     body: schemas.InvitationCreate,
     request: Request,
@@ -66,11 +70,45 @@ async def invite_user(
 ):
     return await views.invite_user_view(body, db, request)
 
-@router.get("/admin/all-users", response_model=List[dict])
-@login_required
-@role_required(["admin"])
-async def get_all_user(
+@router.post("/admin/invite/batch", response_model=dict, dependencies=[Depends(require_role("admin"))])
+async def invite_users_batch(
+    body: schemas.InvitationBatchCreate,
     request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    return await views.get_all_user_view(db, request)
\ No newline at end of file
+    return await views.invite_users_batch_view(body, db, request)
+
+@router.post("/admin/import", response_model=dict, dependencies=[Depends(require_role("admin"))])
+async def import_users(
+    request: Request,
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    # CSV or NDJSON rows: email, password or password_hash, role, is_active
+    return await views.import_users_view(db, request, file, format)
+
+@router.get("/admin/all-users", response_model=schemas.UserListPage, dependencies=[Depends(require_role("admin"))])
+async def get_all_user(
+    request: Request,
+    cursor: Optional[uuid.UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # stream=true returns every user after `cursor` as NDJSON
+    if stream:
+        return await views.stream_all_user_view(request, cursor)
+    return await views.get_all_user_view(db, request, cursor, limit)
+
+@router.get("/admin/metrics/password-hashing", response_model=dict, dependencies=[Depends(require_role("admin"))])
+async def get_password_hasher_metrics(
+    request: Request,
+):
+    return await views.get_password_hasher_metrics_view(request)
+
+@router.get("/admin/metrics/db-pool", response_model=dict, dependencies=[Depends(require_role("admin"))])
+async def get_db_pool_metrics(
+    request: Request,
+):
+    return await views.get_db_pool_metrics_view(request)
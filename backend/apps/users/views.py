@@ -1,17 +1,30 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import HTTPException, Response, Request
-from sqlalchemy import select, delete, update
+from fastapi import HTTPException, Response, Request, UploadFile
+from fastapi.responses import HTMLResponse, StreamingResponse
+from database import AsyncSessionLocal, engine, open_read_session
+from apps.db.engine import pool_status
+from sqlalchemy import select, delete, update, insert, bindparam, any_, literal, String
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.orm import selectinload
-from .models import Users, TokenBlacklist, Invitation, UserRole
-from .schemas import UserCreate, UserLogin, InvitationCreate
+from .models import Users, Activations, TokenBlacklist, Invitation, UserRole
+from .schemas import UserCreate, UserLogin, InvitationCreate, InvitationBatchCreate, UserResponse
 from datetime import datetime, timedelta, timezone
 import os
 import jwt
 from config import settings
-from apps.users.security import hash_password, verify_password
+from apps.users.sessions import session_store
+from apps.users.cache import profile_cache
+from apps.send_email.models import EmailOutbox, invitation_email, activation_email
+from apps.users.singleflight import SingleFlight
+from apps.users.security import hash_password_async, verify_password_async, password_hasher, import_password_hasher
+from apps.users.importer import IMPORT_FORMATS, detect_format, parse_import
 import uuid
 import secrets
+import html
+import json
+import time
+import asyncio
 
 def create_access_token(
     subject: str,
@@ -57,6 +70,9 @@ def create_refresh_token(
 def generate_secure_token() -> str:
     return secrets.token_urlsafe(32)
 
+def _user_by_email_query(email: str):
+    return select(Users).where(Users.email == email)
+
 async def create_user_view(user: UserCreate, db: AsyncSession, invitation_token: Optional[str] = None):
     if invitation_token:
         # Validate invitation token
@@ -72,16 +88,15 @@ async def create_user_view(user: UserCreate, db: AsyncSession, invitation_token:
         user.email=invitation.email
         assigned_role=invitation.role
 
-    existing_user_query= select(Users).where(Users.email == user.email)
-    result = await db.execute(existing_user_query)
+    result = await db.execute(_user_by_email_query(user.email))
     existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     if invitation_token:
-        db_user = Users(email=user.email, password=hash_password(user.password), role=assigned_role, invited_by=invitation.creator_id, is_active=True)
+        db_user = Users(email=user.email, password=await hash_password_async(user.password), role=assigned_role, invited_by=invitation.creator_id, is_active=True)
         db_user._skip_activation = True  # Custom attribute to skip activation email
     else:
-        db_user = Users(email=user.email, password=hash_password(user.password))
+        db_user = Users(email=user.email, password=await hash_password_async(user.password))
         db_user._skip_activation = False  # Custom attribute to indicate activation email should be sent
     db.add(db_user)
     if invitation_token:
@@ -91,21 +106,23 @@ async def create_user_view(user: UserCreate, db: AsyncSession, invitation_token:
     return db_user
 
 async def get_users_view(db: AsyncSession, request: Request):
+    # The token already carries the user id, so this is a primary-key lookup
+    user_id = request.state.user_id
+    profile = await profile_cache.get(user_id)
+    if profile is not None:
+        return profile
 
-    user_email = request.state.user_email
-    result = await db.execute(select(Users).where(Users.email == user_email))
-    db_user = result.scalar_one_or_none()
-    test_tls= await db.execute(select(Users))
-    all_users= test_tls.scalars().all()
-    print(f"All users in DB: {[user.id for user in all_users]}")
+    db_user = await db.get(Users, uuid.UUID(user_id))
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    profile = UserResponse.model_validate(db_user).model_dump(mode="json")
+    await profile_cache.set(user_id, profile)
+    return profile
 
 async def login_user_view(user: UserLogin, response: Response, db: AsyncSession):
-    result = await db.execute(select(Users).where(Users.email == user.email))
+    result = await db.execute(_user_by_email_query(user.email))
     db_user = result.scalar_one_or_none()
-    if db_user and verify_password(user.password, db_user.password):
+    if db_user and await verify_password_async(user.password, db_user.password):
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             subject=db_user.email, user_id=str(db_user.id), role=db_user.role, expires_delta=access_token_expires
@@ -115,17 +132,11 @@ async def login_user_view(user: UserLogin, response: Response, db: AsyncSession)
             subject=db_user.email, user_id=str(db_user.id), role=db_user.role, expires_delta=refresh_token_expires
         )
 
-        # insert jti into TokenBlacklist table
+        # register jti in the session store (persisted to TokenBlacklist in the background)
         payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         jti = payload.get("jti")
         expires_at = datetime.fromtimestamp(payload.get("exp"), tz=timezone.utc)
-        token_blacklist_entry = TokenBlacklist(
-            jti=jti,
-            user_id=db_user.id,
-            expires_at=expires_at
-        )
-        db.add(token_blacklist_entry)
-        await db.commit()
+        await session_store.issue(jti, str(db_user.id), expires_at)
 
         response.set_cookie(key="access_token", value=access_token, httponly=True, secure=False, samesite="lax")
         response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, secure=False, samesite="lax")
@@ -156,6 +167,71 @@ async def activate_user_view(user_email: str, activation_code: str, db: AsyncSes
     await db.commit()
     return {"message": "User activated successfully"}
 
+ACTIVATION_CONFIRM_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Activate your account</title></head>
+<body>
+<form method="post">
+<p>Activate the account for {email}?</p>
+<button type="submit">Activate</button>
+</form>
+</body>
+</html>
+"""
+
+def activation_confirm_page_view(user_email: str) -> HTMLResponse:
+    # Nothing is read or changed here: the form posts back to the same URL
+    return HTMLResponse(ACTIVATION_CONFIRM_PAGE.format(email=html.escape(user_email)))
+
+refresh_flight = SingleFlight()
+
+async def _rotate_refresh_session(old_jti: str, user_email: str, user_id: str, user_role: str) -> dict:
+    # Mint the replacement token pair
+    new_refresh_token = create_refresh_token(
+            subject=user_email, user_id=str(user_id), role=user_role, expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        )
+    new_payload = jwt.decode(new_refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    new_jti = new_payload.get("jti")
+    new_exp = datetime.fromtimestamp(new_payload.get("exp"), tz=timezone.utc)
+    new_access_token = create_access_token(
+        subject=user_email, user_id=user_id, role=user_role, expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    tokens = {"access_token": new_access_token, "refresh_token": new_refresh_token}
+
+    # Atomically swap the old jti for the new one. If another worker rotated it
+    # moments ago, the store hands back that rotation's tokens instead.
+    result = await session_store.rotate(
+        old_jti, new_jti, str(user_id), new_exp,
+        result=json.dumps(tokens),
+        grace=settings.REFRESH_GRACE_SECONDS,
+    )
+    if result is None and await _adopt_legacy_session(old_jti, str(user_id)):
+        result = await session_store.rotate(
+            old_jti, new_jti, str(user_id), new_exp,
+            result=json.dumps(tokens),
+            grace=settings.REFRESH_GRACE_SECONDS,
+        )
+    if result is None:
+        raise HTTPException(status_code=401, detail="Refresh token is invalid or has been revoked")
+    return json.loads(result)
+
+def _legacy_session_query(jti: str, now: datetime):
+    return (
+        select(TokenBlacklist.user_id, TokenBlacklist.expires_at)
+        .where(TokenBlacklist.jti == jti, TokenBlacklist.expires_at > now)
+    )
+
+async def _adopt_legacy_session(jti: str, user_id: str) -> bool:
+    """
+    Sessions issued before the session store existed live only in
+    token_blacklist; load one into the store on its first refresh.
+    """
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(_legacy_session_query(jti, datetime.now(timezone.utc)))).first()
+    if row is None or str(row.user_id) != user_id:
+        return False
+    return await session_store.adopt(jti, user_id, row.expires_at)
+
 async def refresh_token_view(db: AsyncSession, request: Request, response: Response):
     # This function assumes the refresh token is sent via cookies
     refresh_token = request.cookies.get("refresh_token")
@@ -174,37 +250,14 @@ async def refresh_token_view(db: AsyncSession, request: Request, response: Respo
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     
-    # Check if jti is in TokenBlacklist
-    new_refresh_token = create_refresh_token(
-            subject=user_email, user_id=str(user_id), role=user_role, expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        )
-    new_payload = jwt.decode(new_refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    new_jti = new_payload.get("jti")
-    new_exp = datetime.fromtimestamp(new_payload.get("exp"), tz=timezone.utc)
-
-    # Attempt to update the row and if exist return ID
-    statement = (
-        update(TokenBlacklist)
-        .where(TokenBlacklist.jti == old_jti)
-        .values(jti=new_jti, expires_at=new_exp)
-        .returning(TokenBlacklist.id)
+    # Tabs refreshing with the same cookie share one rotation (in-process and within the grace window)
+    tokens = await refresh_flight.do(
+        old_jti,
+        lambda: _rotate_refresh_session(old_jti, user_email, user_id, user_role),
     )
-    result = await db.execute(statement)
-    updated_id = result.scalar_one_or_none()
 
-    if updated_id is None:
-        raise HTTPException(status_code=401, detail="Refresh token is invalid or has been revoked")
-    try:
-        await db.commit()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to update refresh token")
-    
-    new_access_token = create_access_token(
-        subject=user_email, user_id=user_id, role=user_role, expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    
-    response.set_cookie(key="access_token", value=new_access_token, httponly=True, secure=False, samesite="lax")
-    response.set_cookie(key="refresh_token", value=new_refresh_token, httponly=True, secure=False, samesite="lax")
+    response.set_cookie(key="access_token", value=tokens["access_token"], httponly=True, secure=False, samesite="lax")
+    response.set_cookie(key="refresh_token", value=tokens["refresh_token"], httponly=True, secure=False, samesite="lax")
     return {"message": "Access token refreshed"}
 
 async def logout_user_view(db: AsyncSession, request: Request, response: Response):
@@ -221,13 +274,8 @@ async def logout_user_view(db: AsyncSession, request: Request, response: Respons
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     
-    # Delete the token from TokenBlacklist
-    statement = (
-        delete(TokenBlacklist)
-        .where(TokenBlacklist.jti == jti)
-    )
-    await db.execute(statement)
-    await db.commit()
+    # Revoke the session (removed from TokenBlacklist in the background)
+    await session_store.revoke(jti)
     
     # Clear cookies
     response.delete_cookie(key="access_token")
@@ -235,6 +283,9 @@ async def logout_user_view(db: AsyncSession, request: Request, response: Respons
     
     return {"message": "Logged out successfully"}
 
+def _invitation_link(request: Request, token: str) -> str:
+    return f"{request.url.scheme}://{request.url.hostname}:{request.url.port}/register?invitation_token={token}"
+
 async def invite_user_view(body: InvitationCreate, db: AsyncSession, request: Request):
     token = generate_secure_token()
     new_invite = Invitation(
@@ -244,25 +295,199 @@ async def invite_user_view(body: InvitationCreate, db: AsyncSession, request: Re
         token=token,
         expires_at=datetime.now(timezone.utc) + timedelta(days=7),
     )
+    verification_link= _invitation_link(request, token)
     db.add(new_invite)
+    # Queued with the invitation; the outbox dispatcher hands it to Celery
+    db.add(EmailOutbox(**invitation_email(body.email, verification_link)))
     await db.commit()
-    # TODO: Send invitation email with the token link
-    verification_link= f"{request.url.scheme}://{request.url.hostname}:{request.url.port}/register?invitation_token={token}"
-    print(f"Invitation Link is : {verification_link}")
 
     return {"message": "Invitation sent successfully"}
 
-async def get_all_user_view(db: AsyncSession, request: Request):
-    result = await db.execute(select(Users))
-    users = result.scalars().all()
-    users_list = [
+def _taken_emails_query(emails: list[str], now: datetime):
+    """(email, reason) for each address that is registered or has a pending invitation."""
+    email_list = bindparam("emails", emails, type_=ARRAY(String))
+    return (
+        select(Users.email, literal("already registered"))
+        .where(Users.email == any_(email_list))
+        .union_all(
+            select(Invitation.email, literal("already invited"))
+            .where(Invitation.email == any_(email_list), Invitation.expires_at > now)
+        )
+    )
+
+async def invite_users_batch_view(body: InvitationBatchCreate, db: AsyncSession, request: Request):
+    now = datetime.now(timezone.utc)
+
+    # 1. One invitation per address; the first entry wins
+    requested: dict[str, InvitationCreate] = {}
+    for invite in body.invitations:
+        requested.setdefault(invite.email, invite)
+    emails = list(requested)
+
+    # 2. Skip registered users and pending invitations (one query)
+    taken = (await db.execute(_taken_emails_query(emails, now))).all()
+    skipped = {email: reason for email, reason in taken}
+
+    invites = [
         {
-            "id": str(user.id),
-            "email": user.email,
-            "role": user.role,
-            "is_active": user.is_active
+            "email": invite.email,
+            "role": invite.role,
+            "creator_id": request.state.user_id,
+            "token": generate_secure_token(),
+            "expires_at": now + timedelta(days=7),
         }
-        for user in users
+        for email, invite in requested.items() if email not in skipped
     ]
-    
-    return users_list
\ No newline at end of file
+
+    # 3. Insert every invitation and its email in one transaction; the outbox
+    #    dispatcher publishes the queued emails to Celery as a single batch
+    if invites:
+        try:
+            await db.execute(insert(Invitation.__table__), invites)
+            await db.execute(
+                insert(EmailOutbox.__table__),
+                [invitation_email(invite["email"], _invitation_link(request, invite["token"])) for invite in invites],
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Database transaction failed")
+
+    return {
+        "message": f"{len(invites)} invitations sent",
+        "invited": [invite["email"] for invite in invites],
+        "skipped": [{"email": email, "reason": reason} for email, reason in skipped.items()],
+    }
+
+async def import_users_view(db: AsyncSession, request: Request, file: UploadFile, format: Optional[str] = None):
+    """
+    Create many users from a CSV or NDJSON file in a few set-based statements.
+    Inactive users get an activation code and a queued activation email, as
+    on /register; rows that cannot be imported are reported, not fatal.
+    """
+    started = time.monotonic()
+    fmt = detect_format(file.filename, format)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass format=csv|ndjson")
+
+    # 1. Parse and validate every row
+    rows, errors = await asyncio.to_thread(parse_import, file.file, fmt, settings.USER_IMPORT_MAX_ROWS)
+
+    # 2. Drop emails that are already registered (one query)
+    emails = [row.email for _, row in rows]
+    existing = set((await db.scalars(
+        select(Users.email).where(Users.email == any_(bindparam("emails", emails, type_=ARRAY(String))))
+    )).all())
+    for line_no, row in rows:
+        if row.email in existing:
+            errors.append({"row": line_no, "email": row.email, "error": "Email already registered"})
+    rows = [(line_no, row) for line_no, row in rows if row.email not in existing]
+
+    created = 0
+    try:
+        # 3. Hash plain passwords in parallel on the import process pool
+        plain = [row.password for _, row in rows if row.password]
+        hashed = iter(await import_password_hasher.hash_many(plain))
+        records = [
+            {
+                "email": row.email,
+                "password": row.password_hash or next(hashed),
+                "role": row.role,
+                "is_active": row.is_active,
+            }
+            for _, row in rows
+        ]
+
+        # 4. Batched inserts; the Core statements bypass the per-row after_insert hook
+        line_by_email = {row.email: line_no for line_no, row in rows}
+        for start in range(0, len(records), settings.USER_IMPORT_BATCH_SIZE):
+            batch = records[start:start + settings.USER_IMPORT_BATCH_SIZE]
+            inserted = (await db.execute(
+                pg_insert(Users.__table__)
+                .values(batch)
+                .on_conflict_do_nothing(index_elements=["email"])
+                .returning(Users.__table__.c.id, Users.__table__.c.email)
+            )).all()
+            created += len(inserted)
+
+            # Registered concurrently between the duplicate check and the insert
+            inserted_emails = {user.email for user in inserted}
+            for record in batch:
+                if record["email"] not in inserted_emails:
+                    errors.append({"row": line_by_email[record["email"]], "email": record["email"], "error": "Email already registered"})
+
+            inactive = {record["email"] for record in batch if not record["is_active"]}
+            activations = [
+                {"user_id": user.id, "email": user.email, "activation_code": str(uuid.uuid4())}
+                for user in inserted if user.email in inactive
+            ]
+            if activations:
+                await db.execute(
+                    insert(Activations.__table__),
+                    [{"user_id": a["user_id"], "activation_code": a["activation_code"]} for a in activations],
+                )
+                await db.execute(
+                    insert(EmailOutbox.__table__),
+                    [activation_email(a["email"], a["activation_code"], settings.APP_BASE_URL) for a in activations],
+                )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+
+    elapsed = time.monotonic() - started
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "created": created,
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "users_per_second": round(created / elapsed, 2) if elapsed else None,
+    }
+
+_user_list_columns = (Users.id, Users.email, Users.role, Users.is_active)
+
+def _user_list_query(cursor: Optional[uuid.UUID]):
+    # Keyset pagination on the time-ordered uuid7 primary key
+    statement = select(*_user_list_columns).order_by(Users.id)
+    if cursor is not None:
+        statement = statement.where(Users.id > cursor)
+    return statement
+
+def _user_list_item(row) -> dict:
+    return {
+        "id": str(row.id),
+        "email": row.email,
+        "role": row.role,
+        "is_active": row.is_active
+    }
+
+async def get_all_user_view(db: AsyncSession, request: Request, cursor: Optional[uuid.UUID] = None, limit: int = 100):
+    rows = (await db.execute(_user_list_query(cursor).limit(limit + 1))).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "users": [_user_list_item(row) for row in rows],
+        "next_cursor": str(rows[-1].id) if has_more else None,
+    }
+
+async def stream_all_user_view(request: Request, cursor: Optional[uuid.UUID] = None):
+    async def generate():
+        # The request-scoped session is closed before the body is streamed,
+        # so the server-side cursor gets a read session of its own (a replica
+        # when one is healthy, with the same RLS context as the request's).
+        async with await open_read_session(request) as db:
+            result = await db.stream(
+                _user_list_query(cursor).execution_options(yield_per=settings.USER_STREAM_CHUNK_SIZE)
+            )
+            async for partition in result.partitions():
+                yield "".join(json.dumps(_user_list_item(row)) + "\n" for row in partition)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+async def get_password_hasher_metrics_view(request: Request):
+    return password_hasher.metrics.snapshot()
+
+async def get_db_pool_metrics_view(request: Request):
+    return pool_status(engine)
@@ -9,6 +9,112 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Database connection pool (per process; workers use DB_WORKER_POOL_SIZE instead)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_WORKER_POOL_SIZE: int = 2
+    DB_ECHO: bool = False
+    # asyncpg statement caches; turn DB_PREPARED_STATEMENTS off behind PgBouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENTS: bool = True
+
+    # Read replicas for read-only routes (comma-separated URLs; empty reads from the primary)
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_STRATEGY: str = "round_robin"  # or "least_connections"
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    # After a write, the same client reads from the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Refresh-token sessions ("redis" or "memory") and their write-behind to Postgres
+    SESSION_STORE_BACKEND: str = "redis"
+    SESSION_AUDIT_BATCH_SIZE: int = 500
+    # Concurrent refreshes of the same token within this window share one rotation
+    REFRESH_GRACE_SECONDS: float = 10.0
+
+    # Expired-row cleanup (rows deleted per transaction, days to keep used activation codes)
+    RETENTION_BATCH_SIZE: int = 5000
+    ACTIVATION_RETENTION_DAYS: int = 30
+
+    # Outgoing email (SMTP_CONCURRENCY is the number of pooled SMTP sessions per worker)
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_USE_TLS: bool = False
+    SMTP_START_TLS: bool = False
+    SMTP_TIMEOUT: float = 30.0
+    SMTP_FROM: str = "no-reply@localhost"
+    SMTP_CONCURRENCY: int = 8
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_RETRY_BACKOFF: float = 1.0
+    # Recipients still failing after EMAIL_MAX_RETRIES are re-queued with a growing countdown
+    EMAIL_TASK_MAX_RETRIES: int = 5
+    EMAIL_TASK_RETRY_DELAY: float = 60.0
+    # Outbox rows delivered by one deliver_outbox_task, and public URL used in email links.
+    # Undelivered rows are retried after EMAIL_OUTBOX_RETRY_DELAY * 2**(attempts - 1)
+    # seconds; a batch that never reports back is retried after the lease runs out.
+    EMAIL_OUTBOX_BATCH_SIZE: int = 500
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_RETRY_DELAY: float = 60.0
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 600.0
+    APP_BASE_URL: str = "http://localhost:8000"
+
+    # Project storage (one pooled S3 client per process)
+    S3_BUCKET: str = "aws-manas-generic-sites"
+    S3_REGION: str = "us-east-1"
+    S3_ENDPOINT_URL: str | None = None
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_KEEPALIVE_TIMEOUT: float = 60.0
+    S3_RETRY_MAX_ATTEMPTS: int = 5
+    S3_RETRY_MODE: str = "standard"
+    S3_CONNECT_TIMEOUT: float = 5.0
+    S3_READ_TIMEOUT: float = 60.0
+    # Large uploads go up as parallel multipart parts (memory ~ part size x concurrency)
+    S3_MULTIPART_PART_SIZE: int = 16 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 8
+    # Concurrent object uploads when expanding an uploaded zip/tar archive
+    S3_ARCHIVE_CONCURRENCY: int = 16
+    # Lifetime of presigned upload URLs handed to clients, in seconds
+    S3_PRESIGN_EXPIRES: int = 3600
+    # Concurrent DeleteObjects batches (1000 keys each) when removing a version
+    S3_DELETE_CONCURRENCY: int = 8
+    # Direct uploads still pending after this many seconds are aborted and their version removed
+    PROJECT_PENDING_UPLOAD_TTL: int = 24 * 3600
+
+    # Verified access tokens kept in memory per process
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+
+    # User profiles served by /users/info (PROFILE_CACHE_REDIS shares them and their invalidations across processes)
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL: float = 300.0
+    PROFILE_CACHE_REDIS: bool = True
+
+    # Rows fetched per round trip when streaming the admin user listing
+    USER_STREAM_CHUNK_SIZE: int = 1000
+
+    # Project listings: default and maximum page size
+    PROJECT_PAGE_SIZE: int = 100
+    PROJECT_PAGE_SIZE_MAX: int = 500
+
+    # Password hashing worker pool ("thread" or "process")
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_TIMEOUT: float = 10.0
+
+    # Admin bulk user import (rows per request, rows per INSERT, hashing processes)
+    USER_IMPORT_MAX_ROWS: int = 50000
+    USER_IMPORT_BATCH_SIZE: int = 1000
+    USER_IMPORT_HASH_WORKERS: int = os.cpu_count() or 1
+
     # Configuration for loading from a .env file
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -1,16 +1,63 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 import os, sys
 from dotenv import load_dotenv
 load_dotenv(".env")
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import time
+from apps.db.engine import create_engine_from_settings
+from apps.db.replicas import replica_router
 DATABASE_URL = os.getenv('DATABASE_URL')
-engine = create_async_engine(DATABASE_URL)
+engine = create_engine_from_settings(DATABASE_URL)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
-async def get_db():
+# Set on responses to clients that just wrote; holds the pin's expiry time
+DB_PIN_COOKIE = "db_pin"
+
+async def get_db(request: Request):
     async with AsyncSessionLocal() as session:
+        # Lets the after_commit hook flag this request for read-your-writes,
+        # and gives each transaction the caller's RLS context (apps.db.rls)
+        session.info["request_state"] = request.state
         try:
             yield session
         finally:
             # Ensures the connection is returned to the pool 
             # even if the request fails.
             await session.close()
+
+@event.listens_for(Session, "after_commit")
+def _mark_request_wrote(session):
+    state = session.info.get("request_state")
+    if state is not None:
+        state.db_wrote = True
+
+def _is_pinned(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(DB_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+async def open_read_session(request: Request) -> AsyncSession:
+    """
+    A replica session when one is healthy, otherwise the primary. Clients
+    that wrote within DB_READ_YOUR_WRITES_SECONDS stay on the primary so
+    they see their own changes. The caller closes it.
+    """
+    info = {"request_state": request.state}
+    session = None
+    if not _is_pinned(request):
+        session = await replica_router.open_session(info)
+    if session is None:
+        session = AsyncSessionLocal()
+        session.info.update(info)
+    return session
+
+async def get_read_db(request: Request):
+    """Session for read-only routes; see `open_read_session`."""
+    session = await open_read_session(request)
+    try:
+        yield session
+    finally:
+        await session.close()
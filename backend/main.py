@@ -1,5 +1,5 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from celery import Celery
 from celery.schedules import crontab
 from urls import root_router
@@ -7,14 +7,48 @@ import os
 import jwt
 from apps.users.seeds import create_default_admin
 from apps.db.session import async_session
+from apps.users.security import password_hasher, import_password_hasher
+from apps.projects.storage import s3
+from apps.users.cache import profile_cache
+import apps.db.worker  # per-process event loop and engine for Celery tasks
+from apps.db.replicas import replica_router
+from database import DB_PIN_COOKIE
+from config import settings
+import math
+import time
 app = FastAPI()
 
 
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    # get_db flags requests that committed; keep their next reads on the primary
+    if getattr(request.state, "db_wrote", False):
+        window = settings.DB_READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            DB_PIN_COOKIE,
+            str(time.time() + window),
+            max_age=math.ceil(window),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
 # # Create Admin after project startup
 @app.on_event("startup")
 async def startup_event():
     async with async_session() as db:
         await create_default_admin(db)
+    await s3.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    password_hasher.shutdown()
+    import_password_hasher.shutdown()
+    await s3.close()
+    await profile_cache.close()
+    await replica_router.dispose()
 
 celery_app = Celery(
     "worker",
@@ -35,6 +69,18 @@ celery_app.conf.update(
             "task": "apps.users.tasks.remove_blacklisted_token_task",
             "schedule": crontab(hour=12, minute=0),  # 12:00 AM
         },
+        "flush-session-audit-every-10-seconds": {
+            "task": "apps.users.tasks.flush_session_audit_task",
+            "schedule": 10.0,
+        },
+        "dispatch-email-outbox-every-5-seconds": {
+            "task": "apps.send_email.tasks.dispatch_email_outbox_task",
+            "schedule": 5.0,
+        },
+        "reap-abandoned-uploads-hourly": {
+            "task": "apps.projects.tasks.reap_pending_versions_task",
+            "schedule": 3600.0,
+        },
     },
     task_acks_late=True,
 
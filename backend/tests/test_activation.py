@@ -0,0 +1,58 @@
+from urllib.parse import urlsplit
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.send_email.models import activation_email
+from apps.users import urls, views
+from database import get_db
+
+
+@pytest.fixture
+def client(monkeypatch):
+    activations = []
+
+    async def activate_user_view(user_email, activation_code, db):
+        activations.append((user_email, activation_code))
+        return {"message": "User activated successfully"}
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(views, "activate_user_view", activate_user_view)
+    app = FastAPI()
+    app.include_router(urls.router, prefix="/users")
+    app.dependency_overrides[get_db] = no_db
+    client = TestClient(app)
+    client.activations = activations
+    return client
+
+
+def _link_path(email: str) -> str:
+    body = activation_email(email, "code-1", "http://testserver")["body"]
+    return urlsplit(body.rsplit(" ", 1)[-1]).path
+
+
+def test_opening_the_emailed_link_does_not_activate(client):
+    # What a link scanner or a prefetching mail client does
+    response = client.get(_link_path("new@example.com"))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert '<form method="post">' in response.text
+    assert client.activations == []
+
+
+def test_confirming_the_form_activates(client):
+    response = client.post(_link_path("new@example.com"))
+
+    assert response.json() == {"message": "User activated successfully"}
+    assert client.activations == [("new@example.com", "code-1")]
+
+
+def test_confirm_page_escapes_the_email(client):
+    response = client.get(_link_path("<script>@example.com"))
+
+    assert "<script>" not in response.text
+    assert "&lt;script&gt;@example.com" in response.text
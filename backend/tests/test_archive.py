@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import io
+import tarfile
+import tempfile
+import zipfile
+
+import pytest
+
+from apps.projects.archive import iter_archive, safe_member_path, store_entries
+
+PART_SIZE = 1024
+
+
+class FakeS3:
+    """Records what store_entries asks of storage and how much overlaps."""
+
+    def __init__(self, part_size: int = PART_SIZE):
+        self.part_size = part_size
+        self.objects: dict[str, bytes] = {}
+        self.copies: list[tuple[str, str]] = []
+        self.streamed: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def put_bytes(self, key, body, content_type=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            self.objects[key] = body
+        finally:
+            self.in_flight -= 1
+
+    async def copy(self, source_key, key):
+        self.copies.append((source_key, key))
+
+    async def add(self, file_obj, key, content_type=None, size=None, owner_id=None, digest=None):
+        chunks = []
+        while chunk := await asyncio.to_thread(file_obj.read, self.part_size):
+            digest.update(chunk)
+            chunks.append(chunk)
+        self.objects[key] = b"".join(chunks)
+        self.streamed.append(key)
+
+
+def _zip(*members: tuple[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for name, data in members:
+            bundle.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def _tar_gz(*members: tuple[str, bytes | None]) -> io.BytesIO:
+    """A gzipped tar; members with `None` data are directories."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as bundle:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                bundle.addfile(info)
+            else:
+                info.size = len(data)
+                bundle.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def _read_all(file_obj) -> dict[str, bytes]:
+    return {entry.path: entry.reader.read() for entry in iter_archive(file_obj)}
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("index.html", "index.html"),
+    ("./assets/app.js", "assets/app.js"),
+    ("/etc/passwd", "etc/passwd"),
+    ("a/../b.txt", "b.txt"),
+    ("..\\windows.txt", None),
+    ("../x", None),
+    ("a/../../x", None),
+    ("..", None),
+    (".", None),
+])
+def test_member_paths_stay_inside_the_prefix(name, expected):
+    assert safe_member_path(name) == expected
+
+
+def test_zip_entries_skip_directories_and_traversal():
+    bundle = _zip(("index.html", b"<html>"), ("assets/", b""), ("assets/app.js", b"js"), ("../x", b"evil"))
+
+    assert _read_all(bundle) == {"index.html": b"<html>", "assets/app.js": b"js"}
+
+
+def test_tar_gz_entries_skip_directories_and_traversal():
+    bundle = _tar_gz(("assets", None), ("assets/app.js", b"js"), ("../../x", b"evil"), ("index.html", b"<html>"))
+
+    assert _read_all(bundle) == {"assets/app.js": b"js", "index.html": b"<html>"}
+
+
+@pytest.mark.anyio
+async def test_small_entries_are_bounded_by_concurrency():
+    s3 = FakeS3()
+    members = [(f"file-{n}.txt", f"content {n}".encode()) for n in range(20)]
+
+    manifest = await store_entries(s3, iter_archive(_tar_gz(*members)), "v1/", concurrency=3)
+
+    assert s3.max_in_flight == 3
+    assert s3.objects == {f"v1/{name}": data for name, data in members}
+    assert {entry["path"]: entry["content_hash"] for entry in manifest} == {
+        name: hashlib.sha256(data).hexdigest() for name, data in members
+    }
+
+
+@pytest.mark.anyio
+async def test_unchanged_small_entries_are_copied():
+    s3 = FakeS3()
+    previous = {hashlib.sha256(b"same").hexdigest(): "v1/index.html"}
+    bundle = _zip(("index.html", b"same"), ("app.js", b"changed"))
+
+    manifest = await store_entries(s3, iter_archive(bundle), "v2/", concurrency=4, previous=previous)
+
+    assert s3.copies == [("v1/index.html", "v2/index.html")]
+    assert list(s3.objects) == ["v2/app.js"]
+    assert {entry["path"]: entry["copied"] for entry in manifest} == {"index.html": True, "app.js": False}
+
+
+@pytest.mark.anyio
+async def test_large_entries_stream_without_spooling(monkeypatch):
+    s3 = FakeS3()
+    large = bytes(range(256)) * 20  # several parts
+    # Nothing may be staged on disk on the way through
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("archive entry spooled to a temp file")
+
+    monkeypatch.setattr(tempfile, "SpooledTemporaryFile", no_temp_files)
+    monkeypatch.setattr(tempfile, "TemporaryFile", no_temp_files)
+
+    manifest = await store_entries(s3, iter_archive(_tar_gz(("big.bin", large), ("small.txt", b"s"))), "v1/", concurrency=2)
+
+    assert s3.streamed == ["v1/big.bin"]
+    assert s3.objects["v1/big.bin"] == large
+    [big] = [entry for entry in manifest if entry["path"] == "big.bin"]
+    assert big["content_hash"] == hashlib.sha256(large).hexdigest()
+    assert big["size"] == len(large) and not big["copied"]
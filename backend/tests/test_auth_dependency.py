@@ -0,0 +1,157 @@
+import functools
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from apps.users import dependency
+from apps.users.dependency import Principal, get_current_user, require_role
+from config import settings
+
+
+def _token(role: str = "admin", expires_in: float = 60) -> str:
+    return jwt.encode(
+        {
+            "sub": "admin@example.com",
+            "id": "0190b4c2-0000-7000-8000-000000000001",
+            "role": role,
+            "type": "access",
+            "exp": datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    dependency._verified_tokens.clear()
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(dependency.jwt, "decode", counting_decode)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    # Same stacking as the admin routes: route dependency + role check
+    @app.get("/admin", dependencies=[Depends(get_current_user)])
+    async def admin(principal: Principal = Depends(require_role("admin"))):
+        return {"id": principal.id}
+
+    return TestClient(app)
+
+
+def test_token_is_decoded_once_across_requests(client, decode_calls):
+    client.cookies.set("access_token", _token())
+    for _ in range(50):
+        assert client.get("/admin").status_code == 200
+    assert len(decode_calls) == 1
+
+
+def test_role_check_uses_the_cached_principal(client, decode_calls):
+    client.cookies.set("access_token", _token(role="user"))
+    assert client.get("/admin").status_code == 403
+    assert client.get("/admin").status_code == 403
+    assert len(decode_calls) == 1
+
+
+def test_cached_claims_expire_with_the_token(client, decode_calls):
+    client.cookies.set("access_token", _token(expires_in=1))
+    assert client.get("/admin").status_code == 200
+    time.sleep(1.1)
+    response = client.get("/admin")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token expired"
+    assert len(decode_calls) == 2
+
+
+def _old_login_required(func):
+    # The pre-dependency decorator from apps/users/decorators.py: decodes per request
+    @functools.wraps(func)
+    async def wrapper(request: Request):
+        token = request.cookies.get("access_token")
+        if not token:
+            raise HTTPException(status_code=401, detail="Authentication required")
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            request.state.user_email = payload.get("sub")
+            request.state.user_id = payload.get("id")
+        except jwt.PyJWTError:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return await func(request)
+    return wrapper
+
+
+def _old_role_required(required_role: str):
+    # ...and its role check, which decoded the same token a second time
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(request: Request):
+            token = request.cookies.get("access_token")
+            if not token:
+                raise HTTPException(status_code=401, detail="Authentication required")
+            try:
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                if payload.get("role") not in required_role:
+                    raise HTTPException(status_code=403, detail="Insufficient permissions")
+                request.state.user_email = payload.get("sub")
+            except jwt.PyJWTError:
+                raise HTTPException(status_code=401, detail="Invalid or expired token")
+            return await func(request)
+        return wrapper
+    return decorator
+
+
+def _request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/admin",
+        "headers": [(b"cookie", f"access_token={token}".encode())],
+    })
+
+
+@pytest.mark.anyio
+async def test_require_role_is_faster_than_the_decorator_stack():
+    dependency._verified_tokens.clear()
+    token = _token()
+    rounds = 2000
+
+    @_old_login_required
+    @_old_role_required("admin")
+    async def old_route(request: Request):
+        return request.state.user_id
+
+    # What FastAPI resolves for Depends(require_role("admin")) on every request
+    check_admin = require_role("admin")
+
+    async def new_route(request: Request):
+        principal = await check_admin(await get_current_user(request))
+        return principal.id
+
+    async def median(route) -> float:
+        times = []
+        for _ in range(rounds):
+            request = _request(token)
+            started = time.perf_counter()
+            assert await route(request) is not None
+            times.append(time.perf_counter() - started)
+        return statistics.median(times)
+
+    old = await median(old_route)
+    new = await median(new_route)
+
+    print(f"\nmedian auth per request: decorator stack {old * 1e6:.1f} us, require_role {new * 1e6:.1f} us")
+    assert new < old
@@ -0,0 +1,116 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+import apps.projects.models  # noqa: F401
+from apps.db.engine import InstrumentedQueuePool, pool_status
+from apps.users import urls, views
+from apps.users.dependency import Principal, get_current_user
+
+TIMEOUT = 0.2
+
+
+class FakeConnection:
+    """DBAPI connection stand-in; the pool only resets and closes it."""
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _pool(**kwargs) -> InstrumentedQueuePool:
+    options = {"pool_size": 1, "max_overflow": 0, "timeout": TIMEOUT, **kwargs}
+    return InstrumentedQueuePool(FakeConnection, **options)
+
+
+async def _connect(pool):
+    # The async queue only waits from inside a greenlet, as under AsyncEngine
+    return await greenlet_spawn(pool.connect)
+
+
+@pytest.mark.anyio
+async def test_checkout_records_time_spent_waiting():
+    pool = _pool()
+    held = await _connect(pool)
+
+    async def release_later():
+        await asyncio.sleep(0.1)
+        await greenlet_spawn(held.close)
+
+    release = asyncio.create_task(release_later())
+    connection = await _connect(pool)
+    await release
+    await greenlet_spawn(connection.close)
+
+    metrics = pool.metrics.snapshot()
+    assert (metrics["checkouts"], metrics["timeouts"]) == (2, 0)
+    assert metrics["wait_max_ms"] >= 100
+    assert metrics["wait_avg_ms"] == pytest.approx(metrics["wait_max_ms"] / 2, rel=0.2)
+
+
+@pytest.mark.anyio
+async def test_checkout_timeout_is_counted():
+    pool = _pool()
+    held = await _connect(pool)
+
+    with pytest.raises(exc.TimeoutError):
+        await _connect(pool)
+    await greenlet_spawn(held.close)
+
+    metrics = pool.metrics.snapshot()
+    assert (metrics["checkouts"], metrics["timeouts"]) == (2, 1)
+    assert metrics["wait_max_ms"] >= TIMEOUT * 1000
+
+
+def test_status_reports_the_configured_overflow_across_recreate():
+    pool = _pool(pool_size=3, max_overflow=7)
+    pool.metrics.checkouts = 5
+
+    recreated = pool.recreate()
+
+    status = pool_status(SimpleNamespace(pool=recreated))
+    assert (status["size"], status["max_overflow"], status["checkouts"]) == (3, 7, 5)
+
+
+@pytest.fixture
+def metrics_app(monkeypatch):
+    role = {"current": "admin"}
+
+    async def signed_in(request: Request):
+        return Principal(id="0190b4c2-0000-7000-8000-000000000001", email="ops@example.com", role=role["current"], exp=0)
+
+    monkeypatch.setattr(views, "engine", SimpleNamespace(pool=_pool(pool_size=4, max_overflow=2)))
+    app = FastAPI()
+    app.include_router(urls.router, prefix="/users")
+    app.dependency_overrides[get_current_user] = signed_in
+    return SimpleNamespace(app=app, role=role)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("role, status_code", [("admin", 200), ("operator", 403), ("user", 403)])
+async def test_pool_metrics_route_is_admin_only(metrics_app, role, status_code):
+    metrics_app.role["current"] = role
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=metrics_app.app), base_url="http://test") as client:
+        response = await client.get("/users/admin/metrics/db-pool")
+
+    assert response.status_code == status_code
+    if status_code == 200:
+        assert response.json() == {
+            "size": 4,
+            "checked_out": 0,
+            "checked_in": 0,
+            "overflow": 0,
+            "max_overflow": 2,
+            "checkouts": 0,
+            "timeouts": 0,
+            "wait_avg_ms": 0.0,
+            "wait_max_ms": 0.0,
+        }
@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert, select, text
+
+from apps.db import worker
+from apps.send_email import tasks
+from apps.send_email.models import EmailOutbox
+from apps.users.models import Activations, Users
+from config import settings
+from tests.conftest import requires_postgres
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+
+class FakeDelivery:
+    """Fails the recipients listed in `outcomes` ("transient" or "permanent")."""
+
+    def __init__(self, outcomes: dict[str, str] | None = None):
+        self.outcomes = outcomes or {}
+        self.sent: list[str] = []
+
+    async def send_many(self, messages: list[dict]) -> dict:
+        failed = []
+        for index, message in enumerate(messages):
+            outcome = self.outcomes.get(message["to"])
+            if outcome is None:
+                self.sent.append(message["to"])
+            else:
+                failed.append({"index": index, "to": message["to"], "error": outcome, "permanent": outcome == "permanent"})
+        return {"sent": len(messages) - len(failed), "failed": failed}
+
+
+@pytest.fixture
+def outbox(pg_sessionmaker, monkeypatch):
+    """Runs the outbox tasks' logic against the test database; returns the queued batches."""
+    monkeypatch.setattr(worker, "_sessionmaker", pg_sessionmaker)
+    queued: list[list[int]] = []
+    monkeypatch.setattr(tasks, "deliver_outbox_task", SimpleNamespace(delay=queued.append))
+    return queued
+
+
+async def _queue(db, recipients: list[str]) -> list[int]:
+    ids = (await db.scalars(
+        insert(EmailOutbox).returning(EmailOutbox.id),
+        [{"recipient": to, "subject": "Hello", "body": "Hi"} for to in recipients],
+    )).all()
+    await db.commit()
+    return list(ids)
+
+
+async def _rows(db) -> dict[str, EmailOutbox]:
+    db.expire_all()
+    return {row.recipient: row for row in (await db.scalars(select(EmailOutbox))).all()}
+
+
+async def test_new_user_queues_activation_email_in_the_same_transaction(pg_sessionmaker):
+    async with pg_sessionmaker() as db:
+        db.add(Users(email="rolled-back@example.com", password="x"))
+        await db.flush()
+        await db.rollback()
+
+        db.add(Users(email="new@example.com", password="x"))
+        await db.commit()
+
+        code = await db.scalar(select(Activations.activation_code))
+        emails = (await db.scalars(select(EmailOutbox))).all()
+
+    assert [email.recipient for email in emails] == ["new@example.com"]
+    assert f"/users/activate/email=new@example.com/activation_code={code}" in emails[0].body
+    assert emails[0].dispatched_at is None and emails[0].attempts == 0
+
+
+async def test_claimed_rows_are_leased(pg_sessionmaker, outbox):
+    async with pg_sessionmaker() as db:
+        ids = await _queue(db, [f"user{n}@example.com" for n in range(5)])
+
+    await tasks._dispatch_outbox_logic()
+    assert outbox == [ids]
+
+    # Leased: a second dispatcher run finds nothing due
+    await tasks._dispatch_outbox_logic()
+    assert outbox == [ids]
+
+    async with pg_sessionmaker() as db:
+        rows = await _rows(db)
+        now = await db.scalar(select(text("now()")))
+    assert all(row.attempts == 1 for row in rows.values())
+    assert all(row.next_attempt_at > now for row in rows.values())
+    assert all(row.dispatched_at is None for row in rows.values())
+
+
+async def test_locked_rows_are_skipped(pg_sessionmaker, outbox):
+    async with pg_sessionmaker() as db:
+        ids = await _queue(db, [f"user{n}@example.com" for n in range(3)])
+
+    async with pg_sessionmaker() as other_dispatcher:
+        await other_dispatcher.execute(
+            select(EmailOutbox.id).where(EmailOutbox.id == ids[0]).with_for_update()
+        )
+        await tasks._dispatch_outbox_logic()
+        await other_dispatcher.rollback()
+
+    assert outbox == [ids[1:]]
+
+
+async def test_only_delivered_rows_are_marked_dispatched(pg_sessionmaker, outbox, monkeypatch):
+    async with pg_sessionmaker() as db:
+        await _queue(db, ["ok@example.com", "busy@example.com", "gone@example.com"])
+    delivery = FakeDelivery({"busy@example.com": "transient", "gone@example.com": "permanent"})
+    monkeypatch.setattr(tasks, "_delivery", delivery)
+
+    await tasks._dispatch_outbox_logic()
+    assert await tasks._deliver_outbox_logic(outbox[0]) == {"sent": 1, "failed": 2}
+
+    async with pg_sessionmaker() as db:
+        rows = await _rows(db)
+    assert rows["ok@example.com"].dispatched_at is not None
+    assert rows["ok@example.com"].last_error is None
+
+    busy = rows["busy@example.com"]
+    assert busy.dispatched_at is None
+    assert busy.attempts == 1
+    assert busy.next_attempt_at > datetime.now(timezone.utc)
+    assert busy.last_error == "transient"
+
+    # Parked: attempts maxed out, never claimed again
+    gone = rows["gone@example.com"]
+    assert gone.dispatched_at is None
+    assert gone.attempts == settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    assert gone.last_error == "permanent"
+
+    async with pg_sessionmaker() as db:
+        await db.execute(EmailOutbox.__table__.update().values(next_attempt_at=None))
+        await db.commit()
+    await tasks._dispatch_outbox_logic()
+    assert outbox[1] == [busy.id]
+
+    # A redelivered batch skips what was already sent
+    assert await tasks._deliver_outbox_logic([rows["ok@example.com"].id]) == {"sent": 0, "failed": 0}
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+import apps.projects.models  # noqa: F401
+from apps.send_email.models import EmailOutbox
+from apps.users import views
+from apps.users.models import Invitation, Users, UserRole
+from apps.users.schemas import InvitationBatchCreate
+from tests.conftest import requires_postgres
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+INVITE_SUBJECT = "You have been invited"
+
+
+async def _seed(db) -> str:
+    """An admin, a registered user, a pending invitation and a lapsed one; returns the admin's id."""
+    now = datetime.now(timezone.utc)
+    admin = Users(email="admin@example.com", password="x", is_active=True, role=UserRole.ADMIN)
+    registered = Users(email="taken@example.com", password="x", is_active=True)
+    for user in (admin, registered):
+        user._skip_activation = True
+    db.add_all([admin, registered])
+    await db.flush()
+    db.add_all([
+        Invitation(email="pending@example.com", role="user", creator_id=admin.id, token="pending", expires_at=now + timedelta(days=1)),
+        Invitation(email="lapsed@example.com", role="user", creator_id=admin.id, token="lapsed", expires_at=now - timedelta(days=1)),
+    ])
+    await db.commit()
+    return str(admin.id)
+
+
+def _request(user_id: str):
+    return SimpleNamespace(
+        state=SimpleNamespace(user_id=user_id),
+        url=SimpleNamespace(scheme="http", hostname="test", port=8000),
+    )
+
+
+def _batch(*invitations: tuple[str, str]) -> InvitationBatchCreate:
+    return InvitationBatchCreate(invitations=[{"email": email, "role": role} for email, role in invitations])
+
+
+async def test_batch_skips_taken_addresses_and_queues_one_email_each(pg_sessionmaker):
+    async with pg_sessionmaker() as db:
+        admin_id = await _seed(db)
+    body = _batch(
+        ("new@example.com", "operator"),
+        ("taken@example.com", "user"),
+        ("new@example.com", "admin"),
+        ("pending@example.com", "user"),
+        ("lapsed@example.com", "user"),
+        ("other@example.com", "user"),
+    )
+
+    async with pg_sessionmaker() as db:
+        response = await views.invite_users_batch_view(body, db, _request(admin_id))
+
+    assert response["message"] == "3 invitations sent"
+    # Request order, with the repeated address invited once
+    assert response["invited"] == ["new@example.com", "lapsed@example.com", "other@example.com"]
+    assert sorted(response["skipped"], key=lambda skip: skip["email"]) == [
+        {"email": "pending@example.com", "reason": "already invited"},
+        {"email": "taken@example.com", "reason": "already registered"},
+    ]
+
+    async with pg_sessionmaker() as db:
+        # The new invitations, not the lapsed one seeded above
+        invitations = (await db.scalars(
+            select(Invitation).where(Invitation.email.in_(response["invited"]), Invitation.token != "lapsed")
+        )).all()
+        emails = (await db.scalars(select(EmailOutbox).where(EmailOutbox.subject == INVITE_SUBJECT))).all()
+
+    # The first entry for an address wins
+    assert {invite.email: invite.role for invite in invitations} == {
+        "new@example.com": "operator",
+        "lapsed@example.com": "user",
+        "other@example.com": "user",
+    }
+    assert all(str(invite.creator_id) == admin_id for invite in invitations)
+    # One queued email per invitation, carrying its token
+    links = {email.recipient: email.body for email in emails}
+    assert set(links) == set(response["invited"])
+    for invite in invitations:
+        assert f"http://test:8000/register?invitation_token={invite.token}" in links[invite.email]
+
+
+async def test_batch_is_written_in_one_transaction(pg_sessionmaker, monkeypatch):
+    async with pg_sessionmaker() as db:
+        admin_id = await _seed(db)
+    # The outbox insert fails after the invitations went in
+    monkeypatch.setattr(views, "invitation_email", lambda email, link: {"recipient": None, "subject": INVITE_SUBJECT, "body": link})
+
+    async with pg_sessionmaker() as db:
+        with pytest.raises(HTTPException) as raised:
+            await views.invite_users_batch_view(_batch(("new@example.com", "user")), db, _request(admin_id))
+    assert raised.value.status_code == 500
+
+    async with pg_sessionmaker() as db:
+        assert (await db.scalars(select(Invitation.email).order_by(Invitation.email))).all() == [
+            "lapsed@example.com",
+            "pending@example.com",
+        ]
+        assert (await db.scalars(select(EmailOutbox.id))).all() == []
+
+
+async def test_batch_of_taken_addresses_writes_nothing(pg_sessionmaker, statements):
+    async with pg_sessionmaker() as db:
+        admin_id = await _seed(db)
+    statements.clear()
+
+    async with pg_sessionmaker() as db:
+        response = await views.invite_users_batch_view(
+            _batch(("taken@example.com", "user"), ("pending@example.com", "user")), db, _request(admin_id)
+        )
+
+    assert (response["message"], response["invited"]) == ("0 invitations sent", [])
+    assert sorted(response["skipped"], key=lambda skip: skip["email"]) == [
+        {"email": "pending@example.com", "reason": "already invited"},
+        {"email": "taken@example.com", "reason": "already registered"},
+    ]
+    # Just the duplicate check
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith("SELECT")
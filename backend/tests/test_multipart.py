@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import io
+import os
+import uuid
+
+import pytest
+
+from apps.projects.multipart import MIN_PART_SIZE, MultipartUploader, UploadProgress
+from apps.projects.storage import S3Service
+
+PARTS = 4
+CONCURRENCY = 3
+# Three full parts and a short last one
+DATA = os.urandom(MIN_PART_SIZE * (PARTS - 1) + 1024)
+
+
+@pytest.fixture
+async def s3(s3_endpoint):
+    service = S3Service(f"test-{uuid.uuid4().hex[:12]}", endpoint_url=s3_endpoint)
+    client = await service.client()
+    await client.create_bucket(Bucket=service.bucket)
+    yield service
+    await service.close()
+
+
+@pytest.fixture
+async def client(s3):
+    return await s3.client()
+
+
+def _track_parts(client, monkeypatch, fail_part: int | None = None) -> dict:
+    """Wraps upload_part to record how many parts were in flight at once."""
+    seen = {"in_flight": 0, "max_in_flight": 0, "parts": []}
+    upload_part = client.upload_part
+
+    async def tracked(**kwargs):
+        seen["in_flight"] += 1
+        seen["max_in_flight"] = max(seen["max_in_flight"], seen["in_flight"])
+        try:
+            # Long enough for the other parts to start
+            await asyncio.sleep(0.05)
+            if kwargs["PartNumber"] == fail_part:
+                raise ConnectionError("connection reset while sending part")
+            seen["parts"].append(kwargs["PartNumber"])
+            return await upload_part(**kwargs)
+        finally:
+            seen["in_flight"] -= 1
+
+    monkeypatch.setattr(client, "upload_part", tracked)
+    return seen
+
+
+@pytest.mark.anyio
+async def test_parts_upload_concurrently(s3, client, monkeypatch):
+    seen = _track_parts(client, monkeypatch)
+    uploader = MultipartUploader(client, s3.bucket, part_size=MIN_PART_SIZE, concurrency=CONCURRENCY)
+    progress = UploadProgress(key="big.bin")
+    digest = hashlib.sha256()
+
+    await uploader.upload(io.BytesIO(DATA), "big.bin", progress=progress, digest=digest)
+
+    assert sorted(seen["parts"]) == list(range(1, PARTS + 1))
+    assert seen["max_in_flight"] == CONCURRENCY
+    assert (progress.uploaded_bytes, progress.parts_done) == (len(DATA), PARTS)
+    assert digest.hexdigest() == hashlib.sha256(DATA).hexdigest()
+
+    stored = await client.get_object(Bucket=s3.bucket, Key="big.bin")
+    async with stored["Body"] as body:
+        assert await body.read() == DATA
+
+
+@pytest.mark.anyio
+async def test_small_file_is_a_single_put(s3, client, monkeypatch):
+    seen = _track_parts(client, monkeypatch)
+    uploader = MultipartUploader(client, s3.bucket, part_size=MIN_PART_SIZE, concurrency=CONCURRENCY)
+    progress = UploadProgress(key="small.txt")
+
+    await uploader.upload(io.BytesIO(b"hello"), "small.txt", progress=progress)
+
+    assert seen["parts"] == []
+    assert (progress.uploaded_bytes, progress.parts_done) == (5, 1)
+
+
+@pytest.mark.anyio
+async def test_failed_part_aborts_the_upload(s3, client, monkeypatch):
+    _track_parts(client, monkeypatch, fail_part=3)
+    uploader = MultipartUploader(client, s3.bucket, part_size=MIN_PART_SIZE, concurrency=CONCURRENCY)
+
+    with pytest.raises(ConnectionError, match="connection reset"):
+        await uploader.upload(io.BytesIO(DATA), "broken.bin")
+
+    # No parts are left behind to be billed, and no object was created
+    uploads = await client.list_multipart_uploads(Bucket=s3.bucket)
+    assert uploads.get("Uploads", []) == []
+    listing = await client.list_objects_v2(Bucket=s3.bucket)
+    assert listing.get("Contents", []) == []
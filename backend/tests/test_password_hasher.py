@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from apps.users.security import PasswordHasher
+
+
+@pytest.mark.anyio
+async def test_timed_out_job_stays_in_flight_until_it_finishes():
+    hasher = PasswordHasher(workers=1, max_queue=0, timeout=0.1)
+    try:
+        with pytest.raises(HTTPException) as timed_out:
+            await hasher.run(time.sleep, 0.5)
+        assert timed_out.value.status_code == 503
+        assert hasher.metrics.in_flight == 1
+
+        # The worker is still busy, so the pool is still full
+        with pytest.raises(HTTPException) as rejected:
+            await hasher.run(time.sleep, 0)
+        assert rejected.value.detail == "Server busy, please retry"
+
+        await asyncio.sleep(0.6)
+        assert hasher.metrics.in_flight == 0
+        assert await hasher.run(pow, 2, 3) == 8
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_hashing_does_not_block_the_event_loop():
+    hasher = PasswordHasher(workers=2, max_queue=8, timeout=10)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await hasher.run(time.sleep, 0.3)
+    finally:
+        task.cancel()
+        hasher.shutdown()
+    assert ticks >= 10
@@ -0,0 +1,102 @@
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.sql import func
+
+from apps.db import worker
+from apps.projects import tasks, views
+from apps.projects.models import ProjectVersion, VersionStatus
+from apps.projects.schemas import UploadInit
+from apps.projects.storage import S3Service
+from config import settings
+from tests.conftest import requires_postgres, seed_project
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+async def s3(s3_endpoint, monkeypatch):
+    service = S3Service(f"test-{uuid.uuid4().hex[:12]}", endpoint_url=s3_endpoint, part_size=PART_SIZE)
+    client = await service.client()
+    await client.create_bucket(Bucket=service.bucket)
+    monkeypatch.setattr(views, "s3", service)
+    monkeypatch.setattr(tasks, "s3", service)
+    yield service
+    await service.close()
+
+
+@pytest.fixture
+def queued(pg_sessionmaker, monkeypatch):
+    """Runs the task logic against the test database; returns the queued deletions."""
+    monkeypatch.setattr(worker, "_sessionmaker", pg_sessionmaker)
+    jobs: list[tuple[int, str]] = []
+    monkeypatch.setattr(
+        tasks,
+        "delete_project_version_task",
+        SimpleNamespace(apply_async=lambda args, task_id: jobs.append((args[0], task_id))),
+    )
+    return jobs
+
+
+async def test_abandoned_upload_is_aborted_and_removed(pg_sessionmaker, s3, queued):
+    async with pg_sessionmaker() as db:
+        user_id, project_id, _ = await seed_project(db, versions=1)
+    request = SimpleNamespace(state=SimpleNamespace(user_id=user_id))
+
+    # Two direct uploads start; only the first is left behind
+    async with pg_sessionmaker() as db:
+        abandoned = await views.init_upload_view(
+            db, request, UploadInit(project_id=project_id, filename="site.bin", size=3 * PART_SIZE)
+        )
+    async with pg_sessionmaker() as db:
+        fresh = await views.init_upload_view(
+            db, request, UploadInit(project_id=project_id, filename="site.bin", size=3 * PART_SIZE)
+        )
+    client = await s3.client()
+    upload_ids = {
+        row["Key"]: row["UploadId"]
+        for row in (await client.list_multipart_uploads(Bucket=s3.bucket))["Uploads"]
+    }
+    await client.upload_part(
+        Bucket=s3.bucket, Key=abandoned["s3_key"], UploadId=upload_ids[abandoned["s3_key"]],
+        PartNumber=1, Body=b"x" * PART_SIZE,
+    )
+    async with pg_sessionmaker() as db:
+        await db.execute(
+            update(ProjectVersion)
+            .where(ProjectVersion.id == abandoned["version_id"])
+            .values(created_at=func.now() - timedelta(seconds=settings.PROJECT_PENDING_UPLOAD_TTL + 60))
+        )
+        await db.commit()
+
+    reaped = await tasks._reap_pending_versions_logic()
+
+    assert reaped == [abandoned["version_id"]]
+    assert queued == [(abandoned["version_id"], tasks.delete_version_task_id(abandoned["version_id"]))]
+    async with pg_sessionmaker() as db:
+        status = await db.scalar(select(ProjectVersion.status).where(ProjectVersion.id == abandoned["version_id"]))
+    assert status == VersionStatus.DELETING
+
+    # The queued deletion aborts the upload (dropping its part) and removes the row
+    await tasks._delete_version_logic(SimpleNamespace(update_state=lambda **kwargs: None), reaped[0])
+
+    uploads = (await client.list_multipart_uploads(Bucket=s3.bucket)).get("Uploads", [])
+    assert [row["Key"] for row in uploads] == [fresh["s3_key"]]
+    async with pg_sessionmaker() as db:
+        statuses = dict((await db.execute(
+            select(ProjectVersion.id, ProjectVersion.status).where(ProjectVersion.project_id == project_id)
+        )).all())
+        page = await views._list_projects(db, user_id, cursor=None, limit=10)
+    assert abandoned["version_id"] not in statuses
+    assert statuses[fresh["version_id"]] == VersionStatus.PENDING
+
+    # Only the ready version counts; the upload in flight does not
+    assert page["projects"][0]["version_count"] == 1
+
+    # Nothing else is old enough
+    assert await tasks._reap_pending_versions_logic() == []
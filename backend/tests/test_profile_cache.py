@@ -0,0 +1,158 @@
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, text
+
+import apps.projects.models  # noqa: F401  (Users relationships resolve against it)
+from apps.users import views
+from apps.users.cache import ProfileCache
+from apps.users.models import Users, UserRole
+from tests.conftest import TEST_REDIS_URL, requires_postgres, requires_redis
+
+SEEDED_USERS = 1_000_000
+LOOKUPS = 2000
+
+
+class CountingSession:
+    """Stands in for AsyncSession: each get() costs a simulated round trip."""
+
+    def __init__(self, user: Users, latency: float):
+        self.user = user
+        self.latency = latency
+        self.gets = 0
+
+    async def get(self, model, ident):
+        self.gets += 1
+        await asyncio.sleep(self.latency)
+        return self.user
+
+
+def _user() -> Users:
+    return Users(
+        id=uuid.uuid4(),
+        email="user@example.com",
+        password="x",
+        is_active=True,
+        role=UserRole.USER,
+        created_at=datetime.now(timezone.utc),
+        updated_at=None,
+    )
+
+
+@pytest.mark.anyio
+async def test_cached_profile_skips_the_database(monkeypatch):
+    user = _user()
+    request = SimpleNamespace(state=SimpleNamespace(user_id=str(user.id)))
+
+    async def serve(n: int, db) -> float:
+        start = time.perf_counter()
+        for _ in range(n):
+            await views.get_users_view(db, request)
+        return time.perf_counter() - start
+
+    monkeypatch.setattr(views, "profile_cache", ProfileCache(maxsize=0, ttl=60))
+    uncached_db = CountingSession(user, latency=0.002)
+    uncached = await serve(50, uncached_db)
+
+    monkeypatch.setattr(views, "profile_cache", ProfileCache(maxsize=100, ttl=60))
+    cached_db = CountingSession(user, latency=0.002)
+    cached = await serve(50, cached_db)
+
+    assert (uncached_db.gets, cached_db.gets) == (50, 1)
+    assert cached < uncached / 5
+
+
+@pytest.mark.anyio
+async def test_unreachable_redis_falls_back_to_the_database(monkeypatch):
+    user = _user()
+    request = SimpleNamespace(state=SimpleNamespace(user_id=str(user.id)))
+    # Nothing listens on port 1, so every Redis call fails straight away
+    cache = ProfileCache(maxsize=100, ttl=60, redis_url="redis://127.0.0.1:1/0")
+    monkeypatch.setattr(views, "profile_cache", cache)
+    db = CountingSession(user, latency=0)
+    try:
+        for _ in range(3):
+            profile = await views.get_users_view(db, request)
+            assert profile["email"] == "user@example.com"
+    finally:
+        await cache.close()
+
+    # Unsubscribed, so the local copy is never trusted: each request reads the database
+    assert db.gets == 3
+
+
+@requires_redis
+@pytest.mark.anyio
+async def test_invalidation_reaches_other_processes():
+    channel = f"test-profile-invalidations-{uuid.uuid4().hex}"
+    writer = ProfileCache(maxsize=100, ttl=60, redis_url=TEST_REDIS_URL, channel=channel)
+    reader = ProfileCache(maxsize=100, ttl=60, redis_url=TEST_REDIS_URL, channel=channel)
+    user_id = str(uuid.uuid4())
+    try:
+        # Let the reader subscribe, then warm its local copy
+        await reader.get(user_id)
+        for _ in range(50):
+            if reader._subscribed:
+                break
+            await asyncio.sleep(0.05)
+        await reader.set(user_id, {"role": "user"})
+        assert await reader.get(user_id) == {"role": "user"}
+
+        writer.invalidate(user_id)
+        await asyncio.gather(*writer._pending)
+        await asyncio.sleep(0.1)
+
+        assert await reader.get(user_id) is None
+    finally:
+        await writer.close()
+        await reader.close()
+
+
+async def _median_lookup(sessionmaker, user_ids: list[str]) -> float:
+    times = []
+    for user_id in user_ids:
+        request = SimpleNamespace(state=SimpleNamespace(user_id=user_id))
+        async with sessionmaker() as db:
+            start = time.perf_counter()
+            await views.get_users_view(db, request)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+@requires_postgres
+@requires_redis
+@pytest.mark.anyio
+async def test_profile_cache_against_a_million_users(pg_sessionmaker, monkeypatch):
+    async with pg_sessionmaker() as db:
+        await db.execute(text(f"""
+            INSERT INTO users (id, email, password, is_active, role, created_at)
+            SELECT gen_random_uuid(), 'user' || g || '@example.com', 'x', true, 'USER', now()
+            FROM generate_series(1, {SEEDED_USERS}) g
+        """))
+        await db.commit()
+        await db.execute(text("ANALYZE users"))
+        # A hot set of ids drawn from across the table, requested repeatedly
+        hot = [str(user_id) for user_id in (await db.scalars(
+            select(Users.id).order_by(text("random()")).limit(LOOKUPS // 10)
+        )).all()]
+    user_ids = [random.choice(hot) for _ in range(LOOKUPS)]
+
+    monkeypatch.setattr(views, "profile_cache", ProfileCache(maxsize=0, ttl=60))
+    uncached = await _median_lookup(pg_sessionmaker, user_ids)
+
+    cache = ProfileCache(maxsize=LOOKUPS, ttl=60, redis_url=TEST_REDIS_URL, channel=f"bench-{uuid.uuid4().hex}")
+    monkeypatch.setattr(views, "profile_cache", cache)
+    try:
+        await _median_lookup(pg_sessionmaker, hot)  # warm Redis and the subscription
+        cached = await _median_lookup(pg_sessionmaker, user_ids)
+    finally:
+        await cache.close()
+
+    print(f"\nmedian /users/info over {SEEDED_USERS} users: database {uncached * 1000:.3f} ms, cached {cached * 1000:.3f} ms")
+    assert cached < uncached
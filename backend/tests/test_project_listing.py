@@ -0,0 +1,75 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from apps.projects import views
+from apps.projects.models import Project, ProjectVersion, VersionStatus
+from tests.conftest import requires_postgres, seed_project
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+
+async def _seed(db):
+    """
+    One owner with three projects, newest first: one ready version, none,
+    and three ready plus an upload in flight and a version being deleted.
+    """
+    owner_id, busy_id, version_ids = await seed_project(db, versions=3)
+    busy = await db.get(Project, busy_id)
+    busy.active_version_id = version_ids[1]
+    later = func.now() + timedelta(hours=1)
+    db.add_all([
+        ProjectVersion(project_id=busy_id, version="v4", version_no=4, status=VersionStatus.PENDING, created_at=later),
+        ProjectVersion(project_id=busy_id, version="v5", version_no=5, status=VersionStatus.DELETING, created_at=later),
+    ])
+    empty = Project(name="empty", owner_id=uuid.UUID(owner_id))
+    db.add(empty)
+    await db.flush()
+    single = Project(name="single", owner_id=uuid.UUID(owner_id), last_version_no=1)
+    db.add(single)
+    await db.flush()
+    db.add(ProjectVersion(project_id=single.id, version="v1", version_no=1, status=VersionStatus.READY))
+    await db.commit()
+    return owner_id, busy_id, empty.id, single.id, version_ids
+
+
+async def test_projects_are_paged_newest_first_with_stats(pg_sessionmaker):
+    async with pg_sessionmaker() as db:
+        owner_id, busy_id, empty_id, single_id, version_ids = await _seed(db)
+        ready_at = await db.scalar(
+            select(func.max(ProjectVersion.created_at))
+            .where(ProjectVersion.project_id == busy_id, ProjectVersion.status == VersionStatus.READY)
+        )
+
+        first = await views._list_projects(db, owner_id, cursor=None, limit=2)
+        second = await views._list_projects(db, owner_id, cursor=first["next_cursor"], limit=2)
+
+    assert [project["id"] for project in first["projects"]] == [single_id, empty_id]
+    assert first["next_cursor"] == empty_id
+    assert [project["id"] for project in second["projects"]] == [busy_id]
+    assert second["next_cursor"] is None
+
+    single, empty = first["projects"]
+    assert (single["version_count"], single["active_version"]) == (1, None)
+    assert single["latest_deploy_at"] is not None
+    assert (empty["version_count"], empty["active_version"], empty["latest_deploy_at"]) == (0, None, None)
+
+    [busy] = second["projects"]
+    # The pending upload and the version being deleted are newer, but neither counts
+    assert busy["version_count"] == 3
+    assert busy["latest_deploy_at"] == ready_at
+    assert (busy["active_version_id"], busy["active_version"]) == (version_ids[1], "v2")
+
+
+async def test_listing_is_scoped_to_the_owner(pg_sessionmaker):
+    async with pg_sessionmaker() as db:
+        owner_id, *owned, _ = await _seed(db)
+        other_id, other_project_id, _ = await seed_project(db, versions=1)
+
+        mine = await views._list_projects(db, owner_id, cursor=None, limit=10)
+        theirs = await views._list_projects(db, other_id, cursor=None, limit=10)
+
+    assert sorted(project["id"] for project in mine["projects"]) == sorted(owned)
+    assert [project["id"] for project in theirs["projects"]] == [other_project_id]
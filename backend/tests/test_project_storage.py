@@ -0,0 +1,90 @@
+import hashlib
+import io
+import tarfile
+import uuid
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from apps.projects import views
+from apps.projects.archive import iter_archive, store_entries
+from apps.projects.storage import S3Service
+
+
+@pytest.fixture
+async def s3(s3_endpoint, monkeypatch):
+    # Minimum part size, so a 6 MiB file already takes the multipart path
+    service = S3Service(f"test-{uuid.uuid4().hex[:12]}", endpoint_url=s3_endpoint, part_size=5 * 1024 * 1024)
+    client = await service.client()
+    await client.create_bucket(Bucket=service.bucket)
+    monkeypatch.setattr(views, "s3", service)
+    yield service
+    await service.close()
+
+
+def _tar(*members: tuple[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.anyio
+async def test_single_file_streams_with_its_content_type_and_hash(s3):
+    data = b"x" * (6 * 1024 * 1024)
+    upload = UploadFile(
+        io.BytesIO(data),
+        size=len(data),
+        filename="site.bin",
+        headers=Headers({"content-type": "application/wasm"}),
+    )
+
+    stored = await views._store_upload(upload, "projects/demo/v1/", archive=False, owner_id="owner")
+
+    [entry] = stored["manifest"]
+    assert entry["content_hash"] == hashlib.sha256(data).hexdigest()
+    head = await s3.head("projects/demo/v1/site.bin")
+    assert head["ContentType"] == "application/wasm"
+    assert head["ContentLength"] == len(data)
+
+
+@pytest.mark.anyio
+async def test_unchanged_single_file_is_copied_not_uploaded(s3, monkeypatch):
+    data = b"y" * (6 * 1024 * 1024)
+
+    def upload():
+        return UploadFile(io.BytesIO(data), size=len(data), filename="site.bin")
+
+    first = await views._store_upload(upload(), "projects/demo/v1/", archive=False, owner_id="owner")
+    [entry] = first["manifest"]
+    previous = {entry["content_hash"]: entry["s3_key"]}
+
+    uploads = []
+    real_add = s3.add
+    monkeypatch.setattr(s3, "add", lambda *args, **kwargs: uploads.append(args) or real_add(*args, **kwargs))
+    second = await views._store_upload(upload(), "projects/demo/v2/", archive=False, owner_id="owner", previous=previous)
+
+    assert uploads == []
+    assert (second["bytes_uploaded"], second["bytes_copied"]) == (0, len(data))
+    assert second["manifest"][0]["copied"]
+    assert second["manifest"][0]["content_hash"] == entry["content_hash"]
+    head = await s3.head("projects/demo/v2/site.bin")
+    assert head["ContentLength"] == len(data)
+
+
+@pytest.mark.anyio
+async def test_duplicate_archive_paths_keep_the_last_copy(s3):
+    archive = _tar(("index.html", b"old"), ("app.js", b"js"), ("index.html", b"new"))
+
+    manifest = await store_entries(s3, iter_archive(archive), "projects/demo/v2/", concurrency=4)
+
+    assert sorted(entry["path"] for entry in manifest) == ["app.js", "index.html"]
+    [index] = [entry for entry in manifest if entry["path"] == "index.html"]
+    assert index["content_hash"] == hashlib.sha256(b"new").hexdigest()
+    client = await s3.client()
+    body = await client.get_object(Bucket=s3.bucket, Key="projects/demo/v2/index.html")
+    assert await body["Body"].read() == b"new"
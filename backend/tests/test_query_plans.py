@@ -0,0 +1,125 @@
+"""
+Query-plan regression suite: seeds a few hundred thousand rows, runs EXPLAIN
+on the statements the views and background jobs actually send (built by the
+same query functions), and fails on any sequential scan.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import postgresql
+
+from apps.db.retention import expired_batch
+from apps.projects import views as projects_views
+from apps.projects.models import Project
+from apps.send_email.tasks import _due_outbox_query
+from apps.users import views as users_views
+from apps.users.models import Users, UserRole
+from apps.users.tasks import _retention_policies
+from tests.conftest import requires_postgres
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+USERS = 10000
+
+SEED_SQL = [
+    """
+    INSERT INTO activations (user_id, activation_code, is_used, created_at, updated_at)
+    SELECT id, md5(id::text), (random() < 0.9), now() - interval '30 days', now() - random() * interval '30 days'
+    FROM users
+    """,
+    """
+    INSERT INTO projects (name, owner_id, last_version_no)
+    SELECT 'project-' || row_number() OVER (), u.id, 5
+    FROM users u, generate_series(1, 2)
+    """,
+    """
+    INSERT INTO project_versions (project_id, version, version_no, status, s3_key)
+    SELECT p.id, 'v' || g, g, 'ready', 'projects/' || p.name || '/v' || g || '/'
+    FROM projects p, generate_series(1, 5) g
+    """,
+    """
+    UPDATE projects p SET active_version_id = v.id
+    FROM project_versions v WHERE v.project_id = p.id AND v.version_no = 5
+    """,
+    """
+    INSERT INTO project_files (version_id, path, content_hash, size, s3_key)
+    SELECT v.id, 'file-' || g, md5(v.id || '-' || g), 1024, v.s3_key || 'file-' || g
+    FROM (SELECT id, s3_key FROM project_versions ORDER BY id LIMIT 5000) v, generate_series(1, 20) g
+    """,
+    # Most sessions and invitations are still live; retention only sees the tail
+    """
+    INSERT INTO token_blacklist (jti, user_id, created_at, expires_at)
+    SELECT md5(u.id::text || g), u.id, now() - (g || ' hours')::interval, now() + ((g * 7) % 100 - 3) * interval '1 day'
+    FROM users u, generate_series(1, 5) g
+    """,
+    """
+    INSERT INTO invitations (email, role, creator_id, token, created_at, expires_at)
+    SELECT 'invitee-' || g || '@example.com', 'user', (SELECT id FROM users LIMIT 1), md5('invite' || g),
+           now(), now() + (g % 100 - 3) * interval '1 day'
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO email_outbox (recipient, subject, body, dispatched_at)
+    SELECT 'user' || g || '@example.com', 'subject', 'body',
+           CASE WHEN g % 50 = 0 THEN NULL ELSE now() - (g % 30) * interval '1 day' END
+    FROM generate_series(1, 50000) g
+    """,
+]
+
+
+def _hot_queries(owner_id: uuid.UUID, project_id: int) -> dict:
+    now = datetime.now(timezone.utc)
+    queries = {
+        "login by email": users_views._user_by_email_query("user42@example.com"),
+        # What `db.get(Users, id)` sends for the profile
+        "profile by id": select(Users).where(Users.id == owner_id),
+        "duplicate project name": projects_views._project_name_taken_query("project-42"),
+        "project listing": projects_views._list_projects_query(owner_id, cursor=None, limit=20),
+        "project listing, next page": projects_views._list_projects_query(owner_id, cursor=project_id, limit=20),
+        "owned project": projects_views._owned_project_query(project_id, owner_id),
+        "project versions": projects_views._versions_query(project_id),
+        "previous manifest": projects_views._previous_manifest_query(project_id),
+        "user listing": users_views._user_list_query(owner_id).limit(101),
+        "taken invite emails": users_views._taken_emails_query(["user42@example.com", "invitee-42@example.com"], now),
+        "session by jti": users_views._legacy_session_query("missing", now),
+        "pending outbox": _due_outbox_query(500),
+    }
+    for policy in _retention_policies():
+        cutoff = now - policy.keep_for
+        queries[f"expired {policy.name}"] = expired_batch(policy, cutoff)
+        queries[f"expired {policy.name}, next batch"] = expired_batch(policy, cutoff, (cutoff - timedelta(days=1), 1))
+    return queries
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += _seq_scans(child)
+    return found
+
+
+async def test_hot_queries_use_indexes(pg_sessionmaker):
+    async with pg_sessionmaker() as db:
+        await db.execute(insert(Users), [
+            {"id": uuid.uuid4(), "email": f"user{n}@example.com", "password": "x", "is_active": True, "role": UserRole.USER}
+            for n in range(USERS)
+        ])
+        for statement in SEED_SQL:
+            await db.execute(text(statement))
+        await db.commit()
+        await db.execute(text("ANALYZE"))
+
+        owner_id, project_id = (await db.execute(
+            select(Project.owner_id, Project.id).order_by(Project.id).offset(500).limit(1)
+        )).one()
+
+        offenders = {}
+        for name, query in _hot_queries(owner_id, project_id).items():
+            sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+            plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar_one()[0]["Plan"]
+            if scans := _seq_scans(plan):
+                offenders[name] = scans
+
+    assert offenders == {}
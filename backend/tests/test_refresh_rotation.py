@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from apps.users import views
+from apps.users.sessions import InMemorySessionStore
+from config import settings
+
+
+def _cookie_request(refresh_token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/refresh",
+        "headers": [(b"cookie", f"refresh_token={refresh_token}".encode())],
+    })
+
+
+def _set_cookies(response: Response) -> dict:
+    cookies = {}
+    for name, value in response.raw_headers:
+        if name == b"set-cookie":
+            key, _, rest = value.decode().partition("=")
+            cookies[key] = rest.split(";", 1)[0]
+    return cookies
+
+
+@pytest.fixture
+async def store(monkeypatch):
+    store = InMemorySessionStore()
+    monkeypatch.setattr(views, "session_store", store)
+
+    # No token_blacklist rows predate the store here
+    async def no_legacy_session(jti, user_id):
+        return False
+    monkeypatch.setattr(views, "_adopt_legacy_session", no_legacy_session)
+    return store
+
+
+async def _login(store) -> str:
+    token = views.create_refresh_token(
+        subject="user@example.com", user_id="user-1", role="user", expires_delta=timedelta(days=1)
+    )
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    await store.issue(payload["jti"], "user-1", datetime.fromtimestamp(payload["exp"], tz=timezone.utc))
+    return token
+
+
+async def _refresh(refresh_token: str) -> dict:
+    response = Response()
+    await views.refresh_token_view(None, _cookie_request(refresh_token), response)
+    return _set_cookies(response)
+
+
+@pytest.mark.anyio
+async def test_concurrent_refreshes_share_one_rotation(store):
+    token = await _login(store)
+
+    results = await asyncio.gather(*(_refresh(token) for _ in range(20)))
+
+    assert all(cookies == results[0] for cookies in results)
+    events = await store.claim_audit(100)
+    assert [e["event"] for e in events] == ["issued", "rotated"]
+
+
+@pytest.mark.anyio
+async def test_refresh_within_grace_window_returns_the_same_tokens(store):
+    token = await _login(store)
+
+    first = await _refresh(token)
+    # A second tab, after the first rotation finished
+    assert await _refresh(token) == first
+
+
+@pytest.mark.anyio
+async def test_logout_ends_the_grace_window_for_the_replaced_cookie(store):
+    token = await _login(store)
+    rotated = await _refresh(token)
+
+    await views.logout_user_view(None, _cookie_request(rotated["refresh_token"]), Response())
+
+    with pytest.raises(HTTPException) as replayed:
+        await _refresh(token)
+    assert replayed.value.status_code == 401
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from apps.db.retention import RetentionPolicy, purge_expired
+from apps.users.models import TokenBlacklist, Users
+from tests.conftest import requires_postgres
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+EXPIRED = 23
+LIVE = 10
+BATCH_SIZE = 5
+
+
+async def test_expired_rows_are_purged_in_keyset_batches(pg_sessionmaker, statements):
+    now = datetime.now(timezone.utc)
+    async with pg_sessionmaker() as db:
+        user = Users(email="owner@example.com", password="x", is_active=True)
+        db.add(user)
+        await db.flush()
+        # Pairs of rows share an expiry, so batches have to break ties on the id
+        await db.execute(insert(TokenBlacklist), [
+            {"jti": f"expired-{n}", "user_id": user.id, "expires_at": now - timedelta(hours=1 + n // 2)}
+            for n in range(EXPIRED)
+        ] + [
+            {"jti": f"live-{n}", "user_id": user.id, "expires_at": now + timedelta(hours=1 + n // 2)}
+            for n in range(LIVE)
+        ])
+        await db.commit()
+
+    statements.clear()
+    policy = RetentionPolicy(TokenBlacklist, TokenBlacklist.expires_at, batch_size=BATCH_SIZE)
+    removed = await purge_expired(pg_sessionmaker, policy, now)
+
+    assert removed == EXPIRED
+    async with pg_sessionmaker() as db:
+        left = (await db.scalars(select(TokenBlacklist.jti).order_by(TokenBlacklist.jti))).all()
+    assert left == sorted(f"live-{n}" for n in range(LIVE))
+
+    deletes = [sql for sql in statements if sql.lstrip().upper().startswith("DELETE")]
+    assert len(deletes) == -(-EXPIRED // BATCH_SIZE)
+    # Only the first batch starts from the beginning of the index
+    assert "(token_blacklist.expires_at, token_blacklist.id) >" not in deletes[0]
+    assert all("(token_blacklist.expires_at, token_blacklist.id) >" in sql for sql in deletes[1:])
@@ -0,0 +1,59 @@
+import io
+import time
+import uuid
+
+import pytest
+
+from apps.projects.storage import S3Service
+
+UPLOADS = 30
+
+
+@pytest.fixture
+async def s3(s3_endpoint):
+    service = S3Service(f"test-{uuid.uuid4().hex[:12]}", endpoint_url=s3_endpoint)
+    client = await service.client()
+    await client.create_bucket(Bucket=service.bucket)
+    yield service
+    await service.close()
+
+
+async def _upload_with_fresh_clients(s3: S3Service, n: int) -> float:
+    # What every upload paid before: a client (and connection pool) per call
+    start = time.perf_counter()
+    for i in range(n):
+        async with s3.session.client("s3", region_name=s3.region, endpoint_url=s3.endpoint_url) as client:
+            await client.put_object(Bucket=s3.bucket, Key=f"fresh/{i}", Body=b"x" * 1024)
+    return time.perf_counter() - start
+
+
+async def _upload_with_shared_client(s3: S3Service, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        await s3.add(io.BytesIO(b"x" * 1024), f"shared/{i}", size=1024)
+    return time.perf_counter() - start
+
+
+@pytest.mark.anyio
+async def test_uploads_reuse_one_client(s3, monkeypatch):
+    created = []
+    original = s3.session.client
+    monkeypatch.setattr(s3.session, "client", lambda *a, **kw: created.append(a) or original(*a, **kw))
+
+    await _upload_with_shared_client(s3, 5)
+    await s3.delete_prefix("shared/")
+
+    assert created == []
+
+
+@pytest.mark.anyio
+async def test_shared_client_cuts_per_upload_latency(s3):
+    # Warm up both paths once
+    await _upload_with_fresh_clients(s3, 1)
+    await _upload_with_shared_client(s3, 1)
+
+    fresh = await _upload_with_fresh_clients(s3, UPLOADS)
+    shared = await _upload_with_shared_client(s3, UPLOADS)
+
+    print(f"\nper upload: fresh client {fresh / UPLOADS * 1000:.1f} ms, shared client {shared / UPLOADS * 1000:.1f} ms")
+    assert shared < fresh
@@ -0,0 +1,95 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from apps.users.sessions import InMemorySessionStore, RedisSessionStore, SessionStore
+from tests.conftest import TEST_REDIS_URL, requires_redis
+
+
+@pytest.fixture(params=["memory", pytest.param("redis", marks=requires_redis)])
+async def store(request):
+    if request.param == "memory":
+        yield InMemorySessionStore()
+        return
+    # A fresh prefix per test, so nothing needs cleaning up between runs
+    store = RedisSessionStore(TEST_REDIS_URL, prefix=f"test-{secrets.token_hex(4)}:")
+    yield store
+    await store.redis.delete(store.audit_key, store.pending_audit_key, store.audit_lock_key)
+    await store.close()
+
+
+def _expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=1)
+
+
+@pytest.mark.anyio
+async def test_unacknowledged_audit_batch_is_claimed_again(store):
+    for i in range(5):
+        await store.issue(f"jti-{i}", "user", _expiry())
+
+    first = await store.claim_audit(3)
+    assert [e["jti"] for e in first] == ["jti-0", "jti-1", "jti-2"]
+
+    # The flush died before acknowledging: the same batch comes back
+    assert await store.claim_audit(3) == first
+
+    await store.ack_audit()
+    assert [e["jti"] for e in await store.claim_audit(3)] == ["jti-3", "jti-4"]
+    await store.ack_audit()
+    assert await store.claim_audit(3) == []
+
+
+@pytest.mark.anyio
+async def test_audit_lock_admits_one_flush(store):
+    token = await store.lock_audit(ttl=5)
+    assert token is not None
+    assert await store.lock_audit(ttl=5) is None
+
+    # Only the holder can release it
+    await store.unlock_audit("someone-else")
+    assert await store.lock_audit(ttl=5) is None
+
+    await store.unlock_audit(token)
+    assert await store.lock_audit(ttl=5) is not None
+
+
+@pytest.mark.anyio
+async def test_adopted_legacy_session_can_be_rotated(store):
+    assert await store.adopt("legacy", "user", _expiry())
+    assert await store.rotate("legacy", "next", "user", _expiry(), result="tokens", grace=5) == "tokens"
+    # Adopting is not an audit event: the row is already in token_blacklist
+    assert [e["event"] for e in await store.claim_audit(10)] == ["rotated"]
+
+
+@pytest.mark.anyio
+async def test_retired_sessions_cannot_be_adopted(store):
+    # Their token_blacklist rows may still be waiting for the audit flush
+    await store.issue("rotated", "user", _expiry())
+    await store.rotate("rotated", "next", "user", _expiry(), result="tokens", grace=5)
+    assert not await store.adopt("rotated", "user", _expiry())
+
+    await store.revoke("logged-out")
+    assert not await store.adopt("logged-out", "user", _expiry())
+
+    await store.issue("active", "user", _expiry())
+    assert not await store.adopt("active", "someone-else", _expiry())
+
+
+@pytest.mark.anyio
+async def test_revoking_the_new_session_drops_the_old_grace_result(store):
+    await store.issue("old", "user", _expiry())
+    await store.rotate("old", "new", "user", _expiry(), result="tokens", grace=30)
+    assert await store.rotate("old", "other", "user", _expiry(), result="unused", grace=30) == "tokens"
+
+    await store.revoke("new")
+    assert await store.rotate("old", "other", "user", _expiry(), result="unused", grace=30) is None
+
+
+def test_session_store_backends_must_implement_every_operation():
+    class PartialStore(SessionStore):
+        async def issue(self, jti, user_id, expires_at):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStore()
@@ -0,0 +1,30 @@
+import io
+import multiprocessing
+
+import pytest
+
+from apps.users.importer import parse_import
+from apps.users.security import PasswordHasher, verify_password
+
+
+def test_overlong_password_is_a_row_error():
+    # 40 two-byte characters: 40 characters, but 80 bytes
+    data = "email,password\nlong@example.com," + "é" * 40 + "\nok@example.com,secret\n"
+
+    rows, errors = parse_import(io.BytesIO(data.encode("utf-8")), "csv", max_rows=10)
+
+    assert [row.email for _, row in rows] == ["ok@example.com"]
+    assert errors == [{"row": 2, "email": "long@example.com", "error": "password is longer than 72 bytes"}]
+
+
+@pytest.mark.anyio
+async def test_import_hasher_uses_spawned_workers():
+    hasher = PasswordHasher(workers=1, max_queue=0, timeout=30, executor="process")
+    try:
+        hashed = await hasher.hash_many(["first", "second"])
+        assert hasher._executor._mp_context is multiprocessing.get_context("spawn")
+    finally:
+        hasher.shutdown()
+
+    assert verify_password("first", hashed[0])
+    assert verify_password("second", hashed[1])
@@ -0,0 +1,48 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from apps.projects import views
+from tests.conftest import requires_postgres, seed_project
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+
+def _request(user_id: str):
+    return SimpleNamespace(state=SimpleNamespace(user_id=user_id))
+
+
+async def _switch_times(sessionmaker, versions: int, switches: int = 20) -> list[float]:
+    async with sessionmaker() as db:
+        user_id, project_id, version_ids = await seed_project(db, versions)
+    times = []
+    for i in range(switches):
+        async with sessionmaker() as db:
+            start = time.perf_counter()
+            await views.change_version_view(db, _request(user_id), project_id, version_ids[i % len(version_ids)])
+            times.append(time.perf_counter() - start)
+    return times
+
+
+async def test_switch_updates_one_project_row(pg_sessionmaker, statements):
+    async with pg_sessionmaker() as db:
+        user_id, project_id, version_ids = await seed_project(db, versions=500)
+    statements.clear()
+
+    async with pg_sessionmaker() as db:
+        await views.change_version_view(db, _request(user_id), project_id, version_ids[42])
+
+    writes = [s for s in statements if not s.lstrip().upper().startswith(("SELECT", "BEGIN", "COMMIT", "ROLLBACK"))]
+    assert len(writes) == 1
+    assert writes[0].lstrip().upper().startswith("UPDATE PROJECTS SET")
+
+
+async def test_switch_time_is_flat_in_version_count(pg_sessionmaker):
+    small = statistics.median(await _switch_times(pg_sessionmaker, versions=10))
+    large = statistics.median(await _switch_times(pg_sessionmaker, versions=5000))
+
+    print(f"\nmedian switch: 10 versions {small * 1000:.2f} ms, 5000 versions {large * 1000:.2f} ms")
+    # Rewriting every version row would be hundreds of times slower here
+    assert large < small * 3
@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from apps.projects import views
+from apps.projects.models import Project, ProjectVersion
+from tests.conftest import requires_postgres, seed_project
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+CONCURRENT_UPDATES = 40
+
+
+async def test_concurrent_updates_get_distinct_versions(pg_sessionmaker, monkeypatch):
+    async with pg_sessionmaker() as db:
+        user_id, project_id, _ = await seed_project(db, versions=3)
+
+    async def fake_store_upload(file, prefix, archive, owner_id, previous=None):
+        # Hold the allocated number across an await, like a real upload
+        await asyncio.sleep(0.01)
+        return {"s3_key": prefix, "size": 1, "files": 0, "bytes_uploaded": 1, "bytes_copied": 0, "manifest": []}
+
+    monkeypatch.setattr(views, "_store_upload", fake_store_upload)
+    request = SimpleNamespace(state=SimpleNamespace(user_id=user_id))
+
+    async def deploy():
+        async with pg_sessionmaker() as db:
+            return await views.update_project_view(db, request, project_id, file=None)
+
+    results = await asyncio.gather(*(deploy() for _ in range(CONCURRENT_UPDATES)))
+
+    expected = {f"v{n}" for n in range(4, 4 + CONCURRENT_UPDATES)}
+    assert {result["version"] for result in results} == expected
+    async with pg_sessionmaker() as db:
+        version_nos = (await db.scalars(
+            select(ProjectVersion.version_no).where(ProjectVersion.project_id == project_id)
+        )).all()
+        last = await db.scalar(select(Project.last_version_no).where(Project.id == project_id))
+    assert sorted(version_nos) == list(range(1, 4 + CONCURRENT_UPDATES))
+    assert last == 3 + CONCURRENT_UPDATES
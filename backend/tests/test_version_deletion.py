@@ -0,0 +1,219 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from sqlalchemy.sql import Delete
+
+from apps.db import worker
+from apps.projects import tasks, urls, views
+from apps.projects.models import VersionStatus
+from apps.projects.storage import S3Service
+from apps.users.dependency import Principal, get_current_user
+from database import get_db
+
+OWNER = "0190b4c2-0000-7000-8000-000000000001"
+PROJECT_ID, VERSION_ID, OLDER_VERSION_ID = 1, 12, 11
+PREFIX = "projects/demo/v2/"
+# More than one DeleteObjects batch (1000 keys each)
+OBJECTS = 1001
+
+
+class ScriptedSession:
+    """Request session stub: answers scalar() from a script, in order."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.committed = False
+
+    async def scalar(self, statement):
+        return self.answers.pop(0)
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+
+class VersionRow:
+    """The version row as the worker sees it: present until the task deletes it."""
+
+    def __init__(self):
+        self.exists = True
+
+    def session(self):
+        row = self
+
+        class WorkerSession:
+            async def execute(self, statement):
+                if isinstance(statement, Delete):
+                    row.exists = False
+                    return None
+                found = ("demo", "v2", f"{PREFIX}site.bin", None) if row.exists else None
+                return SimpleNamespace(first=lambda: found)
+
+            async def commit(self):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                pass
+
+        return WorkerSession()
+
+
+class Jobs:
+    """Celery result stand-in shared by the fake task and the status view."""
+
+    def __init__(self):
+        self.results = {}
+
+    def update_state(self, job_id, state, meta):
+        self.results[job_id] = SimpleNamespace(state=state, info=meta, failed=lambda: state == "FAILURE")
+
+    def __call__(self, job_id):
+        return self.results.get(job_id, SimpleNamespace(state="PENDING", info=None, failed=lambda: False))
+
+
+@pytest.fixture
+async def s3(s3_endpoint, monkeypatch):
+    service = S3Service(f"test-{uuid.uuid4().hex[:12]}", endpoint_url=s3_endpoint)
+    client = await service.client()
+    await client.create_bucket(Bucket=service.bucket)
+    monkeypatch.setattr(tasks, "s3", service)
+    yield service
+    await service.close()
+
+
+@pytest.fixture
+def deletion(monkeypatch):
+    row = VersionRow()
+    jobs = Jobs()
+    queued = []
+    sessions = []
+
+    async def as_owner(request: Request):
+        request.state.user_id = OWNER
+        return Principal(id=OWNER, email="owner@example.com", role="user", exp=0)
+
+    async def scripted_db():
+        yield sessions.pop(0)
+
+    monkeypatch.setattr(worker, "_sessionmaker", row.session)
+    monkeypatch.setattr(views, "AsyncResult", jobs)
+    monkeypatch.setattr(
+        views,
+        "delete_project_version_task",
+        SimpleNamespace(apply_async=lambda args, task_id: queued.append((args[0], task_id))),
+    )
+    app = FastAPI()
+    app.include_router(urls.router, prefix="/projects")
+    app.dependency_overrides[get_current_user] = as_owner
+    app.dependency_overrides[get_db] = scripted_db
+    return SimpleNamespace(app=app, row=row, jobs=jobs, queued=queued, sessions=sessions)
+
+
+async def _seed(s3: S3Service):
+    client = await s3.client()
+    await asyncio.gather(*(
+        client.put_object(Bucket=s3.bucket, Key=f"{PREFIX}file-{n}", Body=b"x")
+        for n in range(OBJECTS)
+    ))
+    await client.put_object(Bucket=s3.bucket, Key="projects/demo/v1/file-0", Body=b"x")
+
+
+async def _keys(s3: S3Service, prefix: str) -> int:
+    client = await s3.client()
+    count = 0
+    async for page in client.get_paginator("list_objects_v2").paginate(Bucket=s3.bucket, Prefix=prefix):
+        count += len(page.get("Contents", []))
+    return count
+
+
+def _task(jobs: Jobs, job_id: str):
+    return SimpleNamespace(update_state=lambda state, meta: jobs.update_state(job_id, state, meta))
+
+
+async def _status(client, deletion, version_status) -> dict:
+    deletion.sessions.append(ScriptedSession(SimpleNamespace(id=PROJECT_ID), version_status))
+    response = await client.get(f"/projects/delete/{PROJECT_ID}/status", params={"version_id": VERSION_ID})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.anyio
+async def test_delete_is_accepted_then_polled_to_completion(s3, deletion):
+    await _seed(s3)
+    project = SimpleNamespace(id=PROJECT_ID, active_version_id=VERSION_ID)
+    version = SimpleNamespace(id=VERSION_ID, version="v2", status=VersionStatus.READY)
+    request_db = ScriptedSession(project, version, OLDER_VERSION_ID)
+    deletion.sessions.append(request_db)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=deletion.app), base_url="http://test") as client:
+        response = await client.delete(f"/projects/delete/{PROJECT_ID}", params={"version_id": VERSION_ID})
+
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert deletion.queued == [(VERSION_ID, job_id)]
+        # Marked and switched away from in the request; storage is untouched so far
+        assert request_db.committed
+        assert version.status == VersionStatus.DELETING
+        assert project.active_version_id == OLDER_VERSION_ID
+        assert await _keys(s3, PREFIX) == OBJECTS
+
+        assert (await _status(client, deletion, VersionStatus.DELETING))["state"] == "pending"
+
+        result = await tasks._delete_version_logic(_task(deletion.jobs, job_id), VERSION_ID)
+        assert result == {"version_id": VERSION_ID, "deleted_objects": OBJECTS}
+
+        # The last progress report is still what Celery holds until the result lands
+        progress = await _status(client, deletion, VersionStatus.DELETING)
+        assert (progress["state"], progress["deleted_objects"]) == ("progress", OBJECTS)
+        # Once the row is gone the deletion reads as completed
+        assert await _status(client, deletion, None) == {"version_id": VERSION_ID, "state": "completed"}
+
+    assert not deletion.row.exists
+    assert await _keys(s3, PREFIX) == 0
+    assert await _keys(s3, "projects/demo/v1/") == 1
+
+
+@pytest.mark.anyio
+async def test_failed_cleanup_keeps_the_row_and_retries(s3, deletion, monkeypatch):
+    await _seed(s3)
+    client = await s3.client()
+    real_delete_objects = client.delete_objects
+    calls = []
+    first_batch_done = asyncio.Event()
+
+    async def flaky_delete_objects(**kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            # Fail the second batch once the first has landed
+            await first_batch_done.wait()
+            raise ConnectionError("connection reset during DeleteObjects")
+        response = await real_delete_objects(**kwargs)
+        first_batch_done.set()
+        return response
+
+    monkeypatch.setattr(client, "delete_objects", flaky_delete_objects)
+    job_id = tasks.delete_version_task_id(VERSION_ID)
+
+    with pytest.raises(ConnectionError):
+        await tasks._delete_version_logic(_task(deletion.jobs, job_id), VERSION_ID)
+
+    # Part of the prefix is gone, but the row stays so the retry can find it
+    remaining = await _keys(s3, PREFIX)
+    assert 0 < remaining < OBJECTS
+    assert deletion.row.exists
+
+    # Celery's autoretry runs the same logic again
+    result = await tasks._delete_version_logic(_task(deletion.jobs, job_id), VERSION_ID)
+
+    assert result["deleted_objects"] == remaining
+    assert await _keys(s3, PREFIX) == 0
+    assert not deletion.row.exists
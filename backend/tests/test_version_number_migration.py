@@ -0,0 +1,68 @@
+import importlib.util
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+
+from tests.conftest import requires_postgres
+
+pytestmark = [requires_postgres, pytest.mark.anyio]
+
+MIGRATION = Path(__file__).resolve().parent.parent / "alembic" / "versions" / "2026_10_18_1130_e17b5c3a8d92_project_version_numbers.py"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("project_version_numbers", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _upgrade(connection):
+    with Operations.context(MigrationContext.configure(connection)):
+        _migration().upgrade()
+
+
+async def test_names_are_kept_and_only_duplicates_are_renumbered(pg_sessionmaker):
+    engine = pg_sessionmaker.kw["bind"]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # (version, minutes after start): v3 was handed out twice by racing updates
+    versions = [("v1", 0), ("v2", 1), ("v3", 2), ("v3", 3), ("v4", 4), ("v7", 5), ("draft", 6)]
+
+    async with engine.begin() as conn:
+        # Back to the schema before this revision
+        await conn.execute(text("ALTER TABLE project_versions DROP CONSTRAINT uq_project_versions_project_version_no"))
+        await conn.execute(text("ALTER TABLE project_versions DROP COLUMN version_no"))
+        await conn.execute(text("ALTER TABLE projects DROP COLUMN last_version_no"))
+        await conn.execute(text(
+            "INSERT INTO users (id, email, password, is_active, role) "
+            "VALUES ('0190b4c2-0000-7000-8000-000000000001', 'owner@example.com', 'x', true, 'USER')"
+        ))
+        project_id = await conn.scalar(text(
+            "INSERT INTO projects (name, owner_id) "
+            "VALUES ('demo', '0190b4c2-0000-7000-8000-000000000001') RETURNING id"
+        ))
+        for version, minutes in versions:
+            await conn.execute(
+                text("INSERT INTO project_versions (project_id, version, status, created_at) VALUES (:p, :v, 'ready', :at)"),
+                {"p": project_id, "v": version, "at": start + timedelta(minutes=minutes)},
+            )
+
+        await conn.run_sync(_upgrade)
+
+        numbered = (await conn.execute(text(
+            "SELECT version, version_no FROM project_versions ORDER BY created_at"
+        ))).all()
+        last = await conn.scalar(text("SELECT last_version_no FROM projects"))
+
+    assert [tuple(row) for row in numbered] == [
+        ("v1", 1), ("v2", 2), ("v3", 3),
+        # The later duplicate and the unparseable name go past the highest number
+        ("v3", 8),
+        ("v4", 4), ("v7", 7),
+        ("draft", 9),
+    ]
+    assert last == 9
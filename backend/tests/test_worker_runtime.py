@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from apps.db import worker
+from tests.conftest import TEST_DATABASE_URL, requires_postgres
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """A fresh worker runtime, shut down again even if the test fails."""
+    monkeypatch.setattr(worker, "_shutdown_hooks", [])
+    worker.init_worker_runtime()
+    yield worker
+    worker.shutdown_worker_runtime()
+
+
+async def _current():
+    return asyncio.get_running_loop(), worker.get_worker_sessionmaker()
+
+
+def test_tasks_share_one_loop_and_engine(runtime):
+    first_loop, first_sessionmaker = runtime.run_async(_current())
+    for _ in range(5):
+        loop, sessionmaker = runtime.run_async(_current())
+        assert loop is first_loop
+        assert sessionmaker is first_sessionmaker
+    assert first_sessionmaker.kw["bind"] is runtime._engine
+
+
+def test_shutdown_runs_hooks_and_disposes_the_engine(monkeypatch):
+    monkeypatch.setattr(worker, "_shutdown_hooks", [])
+    disposed = []
+    real_dispose = AsyncEngine.dispose
+
+    async def recording_dispose(self, *args, **kwargs):
+        disposed.append((self, asyncio.get_running_loop()))
+        await real_dispose(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncEngine, "dispose", recording_dispose)
+
+    hook_loops = []
+
+    @worker.on_worker_shutdown
+    async def close_clients():
+        hook_loops.append(asyncio.get_running_loop())
+
+    worker.init_worker_runtime()
+    loop = worker._loop
+    engine = worker._engine
+    worker.run_async(_current())
+    worker.shutdown_worker_runtime()
+
+    # Hooks and disposal ran on the worker's own loop, which is then closed
+    assert hook_loops == [loop]
+    assert disposed == [(engine, loop)]
+    assert loop.is_closed()
+    assert (worker._loop, worker._engine, worker._sessionmaker) == (None, None, None)
+
+
+def test_run_async_starts_a_runtime_without_the_init_signal(monkeypatch):
+    # Solo and eager pools never send worker_process_init
+    monkeypatch.setattr(worker, "_shutdown_hooks", [])
+    worker.shutdown_worker_runtime()
+    try:
+        loop, _ = worker.run_async(_current())
+        assert loop is worker._loop
+    finally:
+        worker.shutdown_worker_runtime()
+
+
+@requires_postgres
+def test_tasks_reuse_the_same_connection(monkeypatch):
+    monkeypatch.setattr(worker, "DATABASE_URL", TEST_DATABASE_URL)
+    monkeypatch.setattr(worker, "_shutdown_hooks", [])
+
+    async def backend_pid():
+        async with worker.get_worker_sessionmaker()() as db:
+            return await db.scalar(text("SELECT pg_backend_pid()"))
+
+    worker.init_worker_runtime()
+    try:
+        pids = {worker.run_async(backend_pid()) for _ in range(5)}
+    finally:
+        worker.shutdown_worker_runtime()
+
+    assert len(pids) == 1